@@ -0,0 +1,236 @@
+# preamble
+# region
+
+# benchmarks for the structure prediction algorithm in main.py, run on synthetic amino acid sequences
+# the sequences are generated from a seed, so every run benchmarks exactly the same data
+# results are written as JSON, and can be compared against an earlier result to find regressions
+# more info can be found in the code's attached README file (README.md)
+
+# endregion
+
+
+# imports
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+import main
+
+
+# the 20 standard amino acids and the three structures
+standard_aminos = "ACDEFGHIKLMNPQRSTVWY"
+structure_symbols = "he_"
+
+
+# returns the length of a single synthetic sequence, drawn from the given length distribution
+# "uniform" draws between the minimum and maximum length, "lognormal" draws around the mean length, and "fixed" always uses the mean length
+def generate_length(arg_rng, arg_distribution, arg_mean_length, arg_min_length, arg_max_length):
+
+    if arg_distribution == "uniform":
+        length = arg_rng.randint(arg_min_length, arg_max_length)
+    elif arg_distribution == "lognormal":
+        length = int(arg_rng.lognormvariate(math.log(arg_mean_length), 0.5))
+    elif arg_distribution == "fixed":
+        length = arg_mean_length
+    else:
+        raise ValueError("Unknown length distribution: " + arg_distribution)
+
+    return min(max(length, arg_min_length), arg_max_length)
+
+
+# returns a list of synthetic sequences, each a tuple of an amino acid string and a structure string of the same length
+# the same seed always gives the same sequences
+def generate_proteome(arg_count, arg_seed=0, arg_distribution="lognormal", arg_mean_length=250, arg_min_length=20, arg_max_length=2000):
+
+    rng = random.Random(arg_seed)
+    sequences = []
+
+    for i in range (arg_count):
+        length = generate_length(rng, arg_distribution, arg_mean_length, arg_min_length, arg_max_length)
+        aminos = "".join(rng.choice(standard_aminos) for j in range (length))
+        structures = "".join(rng.choice(structure_symbols) for j in range (length))
+        sequences.append((aminos, structures))
+
+    return sequences
+
+
+# writes synthetic sequences to a file, using the same formatting as the training and testing files
+def write_proteome(arg_filename, arg_sequences):
+
+    with open(arg_filename, "w") as f:
+        for aminos, structures in arg_sequences:
+            lines = ["<>"]
+            for j in range (len(aminos)):
+                lines.append(aminos[j] + " " + structures[j])
+            lines.append("<end>")
+            f.write("\n".join(lines) + "\n")
+
+
+# runs a function a number of times, returning the shortest time it took
+def best_time(arg_function, arg_repeats):
+
+    best = None
+    for i in range (arg_repeats):
+        start = time.perf_counter()
+        arg_function()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+# the version of the benchmarks, changed whenever a benchmark is changed to measure something else, so results are only compared against results of the same benchmarks
+benchmark_version = 2
+
+
+# scores sequences with run_sequence and compare_structures, the reference implementation that the other engines are checked against
+# returns the score and number of tries
+def run_reference_full_test(arg_amino_strings, arg_structure_strings):
+
+    total_score = 0
+    total_tries = 0
+    for i in range (len(arg_amino_strings)):
+        predicted_structure = main.run_sequence(arg_amino_strings[i])
+        total_score += main.compare_structures(predicted_structure, arg_structure_strings[i])
+        total_tries += len(predicted_structure)
+    return total_score, total_tries
+
+
+# returns the result of a single benchmark, with the number of amino acids processed per second
+def benchmark_result(arg_seconds, arg_residues):
+
+    return {"seconds" : arg_seconds, "residues" : arg_residues, "residues_per_second" : arg_residues / arg_seconds if arg_seconds > 0 else 0.0}
+
+
+# runs every benchmark on a synthetic proteome
+# returns a dictionary of results by benchmark name
+def run_benchmarks(arg_count=300, arg_seed=0, arg_distribution="lognormal", arg_mean_length=250, arg_repeats=3, arg_optimizer_trials=62, arg_population=32):
+
+    sequences = generate_proteome(arg_count, arg_seed, arg_distribution, arg_mean_length)
+    residues = sum(len(aminos) for aminos, structures in sequences)
+    results = {}
+
+    handle, filename = tempfile.mkstemp(suffix=".txt")
+    os.close(handle)
+
+    try:
+        write_proteome(filename, sequences)
+
+        # parsing
+        results["parse_read_file"] = benchmark_result(best_time(lambda: main.read_file(filename, "", False), arg_repeats), residues)
+        results["parse_read_records"] = benchmark_result(best_time(lambda: sum(1 for record in main.read_records(filename)), arg_repeats), residues)
+
+        amino_strings, structure_strings = main.read_file(filename, "", False)
+        amino_codes, structure_codes = main.encode_sequences(amino_strings, structure_strings)
+        weight_list = [1]*31
+        main.score_weights(amino_codes, structure_codes, weight_list)
+
+        # single sequence prediction, on the longest sequence
+        longest = max(amino_strings, key=len)
+        results["predict_run_sequence"] = benchmark_result(best_time(lambda: main.run_sequence(longest), arg_repeats), len(longest) - 12)
+        results["predict_run_sequence_encoded"] = benchmark_result(best_time(lambda: main.run_sequence_encoded(longest), arg_repeats), len(longest) - 12)
+        results["predict_run_sequence_vectorized"] = benchmark_result(best_time(lambda: main.run_sequence_vectorized(longest), arg_repeats), len(longest) - 12)
+
+        # full test scoring
+        tables = main.create_tables(weight_list)
+        results["score_reference_full_test"] = benchmark_result(best_time(lambda: run_reference_full_test(amino_strings, structure_strings), arg_repeats), residues)
+        results["score_run_full_test_vectorized"] = benchmark_result(best_time(lambda: main.run_full_test(amino_strings, structure_strings, True), arg_repeats), residues)
+        results["score_run_full_test_encoded"] = benchmark_result(best_time(lambda: main.run_full_test_encoded(amino_codes, structure_codes, tables), arg_repeats), residues)
+
+        # scoring a population of weight lists at once, drawn around the default weights from the same seed
+        rng = random.Random(arg_seed)
+        population = [[rng.uniform(0.9, 1.1) for j in range (len(weight_list))] for i in range (arg_population)]
+        evaluator = main.PopulationEvaluator(amino_codes, structure_codes)
+        results["score_population"] = benchmark_result(best_time(lambda: evaluator.score(population), arg_repeats), residues*arg_population)
+
+        # run_optimization, stopped by a budget after a bounded number of trials
+        results["optimize_full"] = benchmark_result(best_time(lambda: run_optimizer_trials(filename, arg_optimizer_trials, False), arg_repeats), residues*arg_optimizer_trials)
+        results["optimize_incremental"] = benchmark_result(best_time(lambda: run_optimizer_trials(filename, arg_optimizer_trials, True), arg_repeats), residues*arg_optimizer_trials)
+
+    finally:
+        os.remove(filename)
+
+    return results
+
+
+# runs run_optimization on a file for the given number of trials
+# returns the best score and number of tries
+def run_optimizer_trials(arg_filename, arg_trials, enable_incremental):
+
+    best_score, tries, weight_list = main.run_optimization(arg_filename, False, enable_incremental, arg_budget=main.OptimizationBudget(None, arg_trials))
+    return best_score, tries
+
+
+# compares results against baseline results
+# returns a list of the benchmarks that are slower than the baseline by more than the threshold (a fraction, such as 0.2 for 20%)
+def find_regressions(arg_results, arg_baseline, arg_threshold):
+
+    regressions = []
+    for name in arg_baseline:
+        if name not in arg_results:
+            continue
+        baseline_speed = arg_baseline[name]["residues_per_second"]
+        speed = arg_results[name]["residues_per_second"]
+        if speed < baseline_speed * (1 - arg_threshold):
+            regressions.append((name, baseline_speed, speed))
+    return regressions
+
+
+# main program
+# runs the benchmarks, writes the results to a file, and optionally compares them against a baseline
+# returns 1 if any regressions were found, and 0 otherwise
+def main_benchmark(arg_argv=None):
+
+    parser = argparse.ArgumentParser(description="Benchmarks the structure prediction algorithm on synthetic sequences.")
+    parser.add_argument("--count", type=int, default=300, help="number of synthetic sequences")
+    parser.add_argument("--seed", type=int, default=0, help="seed for generating the sequences")
+    parser.add_argument("--distribution", choices=["lognormal", "uniform", "fixed"], default="lognormal", help="distribution of the sequence lengths")
+    parser.add_argument("--mean-length", type=int, default=250, help="mean length of the sequences")
+    parser.add_argument("--repeats", type=int, default=3, help="number of times each benchmark is run, the fastest one being kept")
+    parser.add_argument("--optimizer-trials", type=int, default=62, help="number of optimizer trials to run")
+    parser.add_argument("--population", type=int, default=32, help="number of weight lists scored at once")
+    parser.add_argument("--output", default="benchmark.json", help="file to write the results to")
+    parser.add_argument("--compare", help="file with baseline results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown compared to the baseline counted as a regression, as a fraction")
+    args = parser.parse_args(arg_argv)
+
+    results = run_benchmarks(args.count, args.seed, args.distribution, args.mean_length, args.repeats, args.optimizer_trials, args.population)
+
+    output = {
+        "config" : {"version" : benchmark_version, "count" : args.count, "seed" : args.seed, "distribution" : args.distribution, "mean_length" : args.mean_length, "repeats" : args.repeats, "optimizer_trials" : args.optimizer_trials, "population" : args.population},
+        "environment" : {"python" : platform.python_version(), "platform" : platform.platform(), "numpy" : main.np is not None},
+        "results" : results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(output, f, indent=2)
+
+    print()
+    for name in results:
+        print(name.ljust(34), (str(round(results[name]["residues_per_second"])) + " residues/s").rjust(22))
+    print()
+    print("Results written to " + args.output)
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        if baseline.get("config") != output["config"]:
+            print("Warning: the baseline was run with a different version of the benchmarks or a different configuration")
+        regressions = find_regressions(results, baseline["results"], args.threshold)
+        print()
+        if regressions:
+            for name, baseline_speed, speed in regressions:
+                print("Regression in " + name + ": " + str(round(speed)) + " residues/s, baseline " + str(round(baseline_speed)) + " residues/s")
+            return 1
+        print("No regressions compared to " + args.compare)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_benchmark())
@@ -12,7 +12,216 @@
 
 
 # imports
-from os import path
+from os import path, cpu_count, getpid, replace, stat
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque, OrderedDict
+import argparse
+import bz2
+import cProfile
+import functools
+import gzip
+import hashlib
+import json
+import lzma
+import mmap
+import random
+import shutil
+import sqlite3
+import struct
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# numpy is optional, it is only used by the vectorized prediction engine
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# instrumentation
+# region
+
+# when enabled, the time spent in each phase, the number of calls, and the number of amino acids handled are recorded
+# when disabled, the instrumented functions are called directly, so the only cost is checking a single flag
+# only the main process is instrumented, not the worker processes used for parallel optimizing and running
+instrumentation_enabled = False
+phase_stats = {}
+event_counts = {}
+
+
+# turns the instrumentation on or off, clearing earlier records
+def set_instrumentation(enable_instrumentation):
+
+    global instrumentation_enabled
+
+    instrumentation_enabled = enable_instrumentation
+    reset_instrumentation()
+
+
+# clears the recorded phases and events
+def reset_instrumentation():
+
+    phase_stats.clear()
+    event_counts.clear()
+
+
+# returns a decorator that records the calls to a function, and the time spent in them, as a phase
+# if given, arg_residues is a function returning the number of amino acids handled by a call, given the same arguments as the call
+def instrumented(arg_phase, arg_residues=None):
+
+    def decorator(arg_function):
+
+        @functools.wraps(arg_function)
+        def wrapper(*args, **kwargs):
+
+            if not instrumentation_enabled:
+                return arg_function(*args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                return arg_function(*args, **kwargs)
+            finally:
+                stats = phase_stats.setdefault(arg_phase, [0, 0.0, 0])
+                stats[0] += 1
+                stats[1] += time.perf_counter() - start
+                if arg_residues is not None:
+                    stats[2] += arg_residues(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# returns a decorator that records the time spent producing each record yielded by a generator, such as the sequences read from a file, as a phase
+# the time the caller spends between records, such as predicting and writing them, is not counted
+# if given, arg_residues is a function returning the number of amino acids in a record
+def instrumented_records(arg_phase, arg_residues=None):
+
+    def decorator(arg_function):
+
+        @functools.wraps(arg_function)
+        def wrapper(*args, **kwargs):
+
+            if not instrumentation_enabled:
+                return arg_function(*args, **kwargs)
+            return timed_records(arg_phase, arg_residues, arg_function(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
+
+
+# yields the records of a generator, recording the time spent producing each of them as a phase
+def timed_records(arg_phase, arg_residues, arg_records):
+
+    stats = phase_stats.setdefault(arg_phase, [0, 0.0, 0])
+    while True:
+        start = time.perf_counter()
+        try:
+            record = next(arg_records)
+        except StopIteration:
+            stats[1] += time.perf_counter() - start
+            return
+        stats[0] += 1
+        stats[1] += time.perf_counter() - start
+        if arg_residues is not None:
+            stats[2] += arg_residues(record)
+        yield record
+
+
+# returns the number of amino acids in a padded record, as yielded by read_records
+def count_record_residues(arg_record):
+
+    return max(len(arg_record[0]) - 12, 0)
+
+
+# counts an event, such as an optimizer trial
+def count_event(arg_event, arg_count=1):
+
+    if instrumentation_enabled:
+        event_counts[arg_event] = event_counts.get(arg_event, 0) + arg_count
+
+
+# returns the number of amino acids that are predicted in a list of padded amino strings
+def count_residues(arg_amino_strings, *args, **kwargs):
+
+    return sum(max(len(amino_string) - 12, 0) for amino_string in arg_amino_strings)
+
+
+# returns a summary of the recorded phases and events
+def instrumentation_summary():
+
+    lines = ["Phase".ljust(28) + "Calls".rjust(10) + "Seconds".rjust(12) + "Residues/s".rjust(14)]
+    for phase in phase_stats:
+        calls, seconds, residues = phase_stats[phase]
+        throughput = ""
+        if residues and seconds > 0:
+            throughput = str(round(residues / seconds))
+        lines.append(phase.ljust(28) + str(calls).rjust(10) + str(round(seconds, 4)).rjust(12) + throughput.rjust(14))
+
+    trials = event_counts.get("optimizer_trials", 0)
+    if trials:
+        seconds = phase_stats.get("optimization", [0, 0.0, 0])[1]
+        lines.append("")
+        lines.append("Optimizer trials evaluated: " + str(trials))
+        lines.append("Optimizer steps accepted:   " + str(event_counts.get("optimizer_accepted_steps", 0)))
+        if "optimizer_memo_hits" in event_counts:
+            lines.append("Optimizer memo hits:        " + str(event_counts["optimizer_memo_hits"]))
+        if "optimizer_line_searches" in event_counts:
+            lines.append("Optimizer line searches:    " + str(event_counts["optimizer_line_searches"]))
+        lines.append("Time per trial:             " + str(round(seconds*1000 / trials, 3)) + " ms")
+
+    return "\n".join(lines)
+
+
+# runs a function under cProfile, and optionally tracemalloc, saving the results to files
+# the profile is saved to the given filename, and can be read with pstats
+# the memory use is saved as text to the same filename with ".memory.txt" added
+# returns the result of the function
+def run_profiled(arg_function, arg_profile_filename, enable_tracemalloc=False):
+
+    profiler = cProfile.Profile()
+    if enable_tracemalloc:
+        tracemalloc.start()
+
+    try:
+        return profiler.runcall(arg_function)
+    finally:
+        profiler.dump_stats(arg_profile_filename)
+        if enable_tracemalloc:
+            snapshot = tracemalloc.take_snapshot()
+            current_memory, peak_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            with open(arg_profile_filename + ".memory.txt", "w") as f:
+                f.write("Current memory: " + str(current_memory) + " bytes\n")
+                f.write("Peak memory:    " + str(peak_memory) + " bytes\n\n")
+                for stat in snapshot.statistics("lineno")[:25]:
+                    f.write(str(stat) + "\n")
+
+
+# runs an entry point such as main_opt, main_test or main_run, profiling it if a filename for the profile is given
+# writes a summary of the instrumentation to console afterwards, if it is enabled
+def run_entry_point(arg_function, arg_profile_filename=None, enable_tracemalloc=False):
+
+    reset_instrumentation()
+
+    if arg_profile_filename:
+        result = run_profiled(arg_function, arg_profile_filename, enable_tracemalloc)
+    else:
+        result = arg_function()
+
+    if instrumentation_enabled:
+        print()
+        print(instrumentation_summary())
+    if arg_profile_filename:
+        print()
+        print("Profile successfully written to " + arg_profile_filename)
+
+    return result
+
+# endregion
 
 
 # default values for the data sets, based on the Chou-Fasman method
@@ -29,6 +238,7 @@ sheet_indiff      = ["A", "R", "G", "D"]
 
 
 # returns the dictionaries used to hold data, updated with the current individual adjustment coefficients
+@instrumented("create_dicts")
 def create_dicts(arg_weight_list):
 
     h_formers     = {"E" : 1.37*arg_weight_list[0], "A" : 1.29*arg_weight_list[1], "L" : 1.20*arg_weight_list[2], "H" : 1.11*arg_weight_list[3], "M" : 1.07*arg_weight_list[4], "Q" : 1.04*arg_weight_list[5], "W" : 1.02*arg_weight_list[6], "V" : 1.02*arg_weight_list[7], "F" : 1.00*arg_weight_list[8]}
@@ -43,6 +253,7 @@ def create_dicts(arg_weight_list):
 
 
 # returns the dictionaries used to hold data, updated with the current individual adjustment coefficients from a file
+@instrumented("create_dicts_file")
 def create_dicts_file(arg_filename, enable_console=True):
 
     filename = arg_filename
@@ -52,17 +263,11 @@ def create_dicts_file(arg_filename, enable_console=True):
         if console_filename:
             filename = console_filename
 
-    weight_list = []
-
     if not path.exists(filename):
 
        write_weights(filename, [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1], False)
 
-    with open(arg_filename, "r") as f:
-
-        for line in f:
-            if line != "\n":
-                weight_list.append(float(line.strip()))
+    weight_list = read_weights(arg_filename)
 
     h_formers     = {"E" : 1.37*weight_list[0], "A" : 1.29*weight_list[1], "L" : 1.20*weight_list[2], "H" : 1.11*weight_list[3], "M" : 1.07*weight_list[4], "Q" : 1.04*weight_list[5], "W" : 1.02*weight_list[6], "V" : 1.02*weight_list[7], "F" : 1.00*weight_list[8]}
     h_high_indiff = {"K" : 0.54*weight_list[9], "I" : 0.50*weight_list[10]}
@@ -75,6 +280,20 @@ def create_dicts_file(arg_filename, enable_console=True):
     return h_formers, h_high_indiff, h_breakers, h_indiff, s_formers, s_breakers, s_indiff
 
 
+# reads a list of weights from a file, without asking for a filename or creating the file
+def read_weights(arg_filename):
+
+    weight_list = []
+
+    with open(arg_filename, "r") as f:
+
+        for line in f:
+            if line != "\n":
+                weight_list.append(float(line.strip()))
+
+    return weight_list
+
+
 # gets a value from a certain dictionary, returning 0 if the specified key does not exist in the dictionary
 def get_value(arg_key, arg_dict):
     
@@ -83,24 +302,30 @@ def get_value(arg_key, arg_dict):
     return 0
 
 
-# gets data for training or testing from a file, returning two arrays of strings
-# one array holds each test's amino acids, the other holds each test's structures
-def read_file(arg_filename, input_string, enable_console=True):
+# the functions opening compressed files of each type, by the extension of the filename
+compressed_openers = {".gz" : gzip.open, ".bz2" : bz2.open, ".xz" : lzma.open}
 
-    filename = arg_filename
 
-    if enable_console:
-        console_filename = input(input_string)
-        if console_filename:
-            filename = console_filename
+# opens a text file for reading ("r") or writing ("w")
+# files ending in .gz, .bz2 or .xz are decompressed while reading and compressed while writing, a little at a time
+def open_text(arg_filename, arg_mode="r"):
 
-    output_amino_strings = []
-    output_structure_strings = []
-    current_amino_string = "Z"*6
-    current_structure_string = "z"*6
+    extension = path.splitext(arg_filename)[1].lower()
+    if extension in compressed_openers:
+        return compressed_openers[extension](arg_filename, arg_mode + "t")
+    return open(arg_filename, arg_mode)
+
+
+# gets data for training or testing from a file, one sequence at a time
+# yields the amino acids and the structures of each sequence, padded the same way as read_file
+@instrumented_records("read_records", count_record_residues)
+def read_records(arg_filename):
+
+    current_aminos = ["Z"*6]
+    current_structures = ["z"*6]
     begin = False
 
-    with open(filename, "r") as f:
+    with open_text(arg_filename) as f:
         for line in f:
 
             if line[:2] == "<>":
@@ -108,18 +333,83 @@ def read_file(arg_filename, input_string, enable_console=True):
 
             elif line[:5] == "<end>" or line[:3] == "end":
                 begin = False
-                current_amino_string += "Z"*6
-                current_structure_string += "z"*6
-                output_amino_strings.append(current_amino_string)
-                output_structure_strings.append(current_structure_string)
-                current_amino_string = "Z"*6
-                current_structure_string = "z"*6
+                current_aminos.append("Z"*6)
+                current_structures.append("z"*6)
+                yield "".join(current_aminos), "".join(current_structures)
+                current_aminos = ["Z"*6]
+                current_structures = ["z"*6]
 
             else:
                 if begin:
-                    current_amino_string += line[0]
+                    current_aminos.append(line[0])
                     if len(line) > 2:
-                        current_structure_string += line[2]
+                        current_structures.append(line[2])
+
+
+# gets sequences from a FASTA file, one sequence at a time
+# each sequence starts with a header line starting with ">", followed by its amino acids on any number of lines
+# yields the amino acids of each sequence, padded the same way as read_records, and only the padding as its structures, since they are unknown
+# if a list of names is given, the header of each sequence (without the ">") is added to it as the sequence is read
+@instrumented_records("read_fasta_records", count_record_residues)
+def read_fasta_records(arg_filename, arg_names=None):
+
+    current_aminos = None
+
+    with open_text(arg_filename) as f:
+        for line in f:
+
+            if line[:1] == ">":
+                if current_aminos is not None:
+                    yield "Z"*6 + "".join(current_aminos) + "Z"*6, "z"*12
+                current_aminos = []
+                if arg_names is not None:
+                    arg_names.append(line[1:].strip())
+
+            # lines starting with ";" are comments, and a "*" marks the end of a sequence
+            elif current_aminos is not None and line[:1] != ";":
+                current_aminos.append("".join(line.split()).rstrip("*").upper())
+
+    if current_aminos is not None:
+        yield "Z"*6 + "".join(current_aminos) + "Z"*6, "z"*12
+
+
+# determines if a file holds sequences in FASTA format, from its first line that is not empty
+def is_fasta_file(arg_filename):
+
+    with open_text(arg_filename) as f:
+        for line in f:
+            if line.strip():
+                return line[:1] == ">"
+    return False
+
+
+# gets sequences from a file in either FASTA format or the same format as the training and testing files, one sequence at a time
+# yields the same as read_fasta_records or read_records, and adds the names of the sequences of a FASTA file to the given list of names
+def read_input_records(arg_filename, arg_names=None):
+
+    if is_fasta_file(arg_filename):
+        return read_fasta_records(arg_filename, arg_names)
+    return read_records(arg_filename)
+
+
+# gets data for training or testing from a file, returning two arrays of strings
+# one array holds each test's amino acids, the other holds each test's structures
+@instrumented("read_file")
+def read_file(arg_filename, input_string, enable_console=True):
+
+    filename = arg_filename
+
+    if enable_console:
+        console_filename = input(input_string)
+        if console_filename:
+            filename = console_filename
+
+    output_amino_strings = []
+    output_structure_strings = []
+
+    for amino_string, structure_string in read_records(filename):
+        output_amino_strings.append(amino_string)
+        output_structure_strings.append(structure_string)
 
     return output_amino_strings, output_structure_strings
 
@@ -146,9 +436,27 @@ def write_weights(arg_filename, arg_weight_list, enable_console=True):
     return filename
 
 
+# returns a single sequence of aminos + structures, formatted the way write_structures saves it
+def format_structures(arg_amino, arg_structure):
+
+    lines = ["\n<>"]
+    for j in range (len(arg_structure)):
+        lines.append("\n" + arg_amino[j+6] + " " + arg_structure[j])
+    lines.append("\n<end>")
+
+    return "".join(lines)
+
+
 # writes the list of aminos + structures to a file for saving
 def write_structures(arg_filename, arg_aminos, arg_structures, enable_console=True):
 
+    return write_structures_stream(arg_filename, zip(arg_aminos, arg_structures), enable_console)
+
+
+# writes aminos + structures to a file for saving, one sequence at a time as they are given
+# the input is an iterable of amino strings and their structures
+def write_structures_stream(arg_filename, arg_records, enable_console=True):
+
     filename = arg_filename
 
     if enable_console:
@@ -156,22 +464,57 @@ def write_structures(arg_filename, arg_aminos, arg_structures, enable_console=Tr
         if console_filename:
             filename = console_filename
 
-    with open(filename, "w") as f:
+    with open_text(filename, "w") as f:
+
+        for amino, structure in arg_records:
+            write_record(f, amino, structure)
 
-        for i in range (len(arg_structures)):
-            f.write("\n<>")
+    return filename
+
+
+# returns a single sequence of aminos + structures as one line, with its name, its amino acids without the padding and its structures, separated by tabs
+def format_structures_compact(arg_name, arg_amino, arg_structure):
+
+    return arg_name + "\t" + arg_amino[6:6+len(arg_structure)] + "\t" + arg_structure + "\n"
+
+
+# writes aminos + structures to a file for saving, one line per sequence as they are given
+# the input is an iterable of amino strings and their structures, and optionally an iterable of names of the sequences, in the same order
+# a deque of names is used as it is, so it can be filled while the sequences are read, such as by read_input_records, and any other iterable is read into a deque first
+# without names, or once the names run out, each sequence is named by its number, counting from 1
+def write_structures_compact(arg_filename, arg_records, arg_names=None, enable_console=True):
+
+    filename = arg_filename
 
-            for j in range (len(arg_structures[i])):
-                f.write("\n")
-                f.write(arg_aminos[i][j+6])
-                f.write(" ")
-                f.write(arg_structures[i][j])
+    if arg_names is not None and not isinstance(arg_names, deque):
+        arg_names = deque(arg_names)
 
-            f.write("\n<end>")
+    if enable_console:
+        console_filename = input("Input path + name + extension of the target text file for saving predicted structures, or press enter without input to use the default name (\"" + arg_filename + "\"): ")
+        if console_filename:
+            filename = console_filename
+
+    with open_text(filename, "w") as f:
+
+        number = 0
+        for amino, structure in arg_records:
+            number += 1
+            if arg_names:
+                name = arg_names.popleft()
+            else:
+                name = str(number)
+            f.write(format_structures_compact(name, amino, structure))
 
     return filename
 
 
+# writes a single sequence of aminos + structures to an open file, with a single write
+@instrumented("write_structures", lambda f, arg_amino, arg_structure: len(arg_structure))
+def write_record(f, arg_amino, arg_structure):
+
+    f.write(format_structures(arg_amino, arg_structure))
+
+
 # determines if a helix structure is to be broken, if the current structure is a helix
 # the input is a string of length 3: the current amino acid, the previous one, and the next one
 def terminate_helix(arg_string):
@@ -208,6 +551,110 @@ def cont_sheet(arg_string):
     return False
 
 
+# continue/terminate decision table
+# region
+
+# the continue/terminate decisions only depend on three amino acids and the breaker/indifferent sets, so they are precomputed for every context of three amino acids
+# a table is only built once for each combination of sets, and looked up again when the sets are the same
+
+# bit flags for the decisions held by a context table
+cont_helix_flag = 1
+cont_sheet_flag = 2
+terminate_helix_flag = 4
+terminate_sheet_flag = 8
+
+# the amino acids given their own context codes, along with every amino acid in the breaker/indifferent sets, including the "Z" padding
+# any other amino acid belongs to none of the sets, so they all share a single context code
+context_alphabet = "ACDEFGHIKLMNPQRSTVWYZ"
+
+# the context tables built so far, by the sets they were built for
+context_tables = {}
+
+
+# returns the context table for the given breaker and indifferent sets
+# the table is a dictionary from amino acids to context codes, a byte translation table to context codes, the number of codes, and the bit flags of every context
+# the flags of a context are at index (previous code * number of codes + current code) * number of codes + next code
+def create_context_table(h_breakers, h_indiff, s_breakers, s_indiff):
+
+    key = (tuple(h_breakers), tuple(h_indiff), tuple(s_breakers), tuple(s_indiff))
+    if key in context_tables:
+        return context_tables[key]
+
+    alphabet = sorted(set(context_alphabet) | set(h_breakers) | set(h_indiff) | set(s_breakers) | set(s_indiff))
+    size = len(alphabet) + 1
+
+    char_codes = {}
+    code_map = bytearray([size - 1]*256)
+    for code in range (len(alphabet)):
+        char_codes[alphabet[code]] = code
+        if ord(alphabet[code]) < 256:
+            code_map[ord(alphabet[code])] = code
+
+    # the shared context code is represented by None, which belongs to none of the sets
+    members = alphabet + [None]
+    flags = bytearray(size**3)
+    for prev_code in range (size):
+        prev_amino = members[prev_code]
+        for curr_code in range (size):
+            curr_amino = members[curr_code]
+            for next_code in range (size):
+                next_amino = members[next_code]
+
+                term_h = (curr_amino in h_breakers) and ( (prev_amino in h_breakers) or (prev_amino in h_indiff) or (next_amino in h_breakers) or (next_amino in h_indiff) )
+                term_e = (curr_amino in s_breakers) and ( (prev_amino in s_breakers) or (prev_amino in s_indiff) or (next_amino in s_breakers) or (next_amino in s_indiff) )
+                cont_h = curr_amino != "P" and not term_h
+                cont_e = curr_amino != "P" and curr_amino != "E" and not term_e
+
+                flags[(prev_code*size + curr_code)*size + next_code] = cont_h*cont_helix_flag + cont_e*cont_sheet_flag + term_h*terminate_helix_flag + term_e*terminate_sheet_flag
+
+    context_tables[key] = char_codes, bytes(code_map), size, bytes(flags)
+    return context_tables[key]
+
+
+# returns the context table for the current dictionaries
+def get_context_table():
+
+    return create_context_table(helix_breakers, helix_indiff, sheet_breakers, sheet_indiff)
+
+
+# returns the continue/terminate bit flags from a context table
+# the input is a string of length 3: the current amino acid, the previous one, and the next one
+def context_flags(arg_string, arg_context_table):
+
+    char_codes, code_map, size, flags = arg_context_table
+    other = size - 1
+    return flags[(char_codes.get(arg_string[0], other)*size + char_codes.get(arg_string[1], other))*size + char_codes.get(arg_string[2], other)]
+
+
+# verifies the context table for the current dictionaries against terminate_helix, terminate_sheet, cont_helix and cont_sheet, for every context of three amino acids
+# returns True if every decision is the same
+def verify_context_table():
+
+    context_table = get_context_table()
+    char_codes, code_map, size, flags = context_table
+
+    # the byte translation table must give the same codes as the dictionary
+    for byte in range (256):
+        if code_map[byte] != char_codes.get(chr(byte), size - 1):
+            return False
+
+    # chr(0) represents the amino acids sharing a context code
+    members = list(char_codes) + [chr(0)]
+    for prev_amino in members:
+        for curr_amino in members:
+            for next_amino in members:
+                context = prev_amino + curr_amino + next_amino
+                decisions = context_flags(context, context_table)
+                if bool(decisions & cont_helix_flag) != cont_helix(context) or bool(decisions & cont_sheet_flag) != cont_sheet(context):
+                    return False
+                if bool(decisions & terminate_helix_flag) != terminate_helix(context) or bool(decisions & terminate_sheet_flag) != terminate_sheet(context):
+                    return False
+
+    return True
+
+# endregion
+
+
 # determines if a helix structure is to be started
 # the input is a string of length 13: the five previous, as well as the current, and next five, amino acids
 def init_helix(arg_string):
@@ -239,7 +686,10 @@ def init_sheet(arg_string):
 
 # determines the structure of the current amino acid
 # the input is a string of length 13: the five previous, as well as the current, and next five, amino acids
-def predict_structure(arg_string, last_structure):
+def predict_structure(arg_string, last_structure, arg_context_table=None):
+
+    if arg_context_table is None:
+        arg_context_table = get_context_table()
 
     init_h, score_h = init_helix(arg_string)
     init_e, score_e = init_sheet(arg_string[1:-1])
@@ -250,11 +700,13 @@ def predict_structure(arg_string, last_structure):
         else:
             init_h = False
     
-    if init_h or (cont_helix(arg_string[5:8]) and last_structure == "h"):
+    decisions = context_flags(arg_string[5:8], arg_context_table)
+
+    if init_h or (decisions & cont_helix_flag and last_structure == "h"):
         return "h"
-    elif init_e or (cont_sheet(arg_string[5:8]) and last_structure == "e"):
+    elif init_e or (decisions & cont_sheet_flag and last_structure == "e"):
         return "e"
-    elif ( last_structure == "h" and terminate_helix(arg_string[5:8]) ) or ( last_structure == "e" and terminate_sheet(arg_string[5:8]) ) or ( last_structure == "_" and ( not init_h ) and ( not init_e ) ):
+    elif ( last_structure == "h" and decisions & terminate_helix_flag ) or ( last_structure == "e" and decisions & terminate_sheet_flag ) or ( last_structure == "_" and ( not init_h ) and ( not init_e ) ):
         return "_"
     else:
         return "_"
@@ -262,12 +714,15 @@ def predict_structure(arg_string, last_structure):
 
 # runs a series of structure predictions on a single sequence of amino acids, returning a string containing the structures
 # the input is a string of amino acids of any length
+# this is the reference implementation, the prediction and scoring functions below use the encoded engine (run_sequence_encoded), which gives the same structures
+@instrumented("run_sequence", lambda arg_amino: max(len(arg_amino) - 12, 0))
 def run_sequence(arg_amino):
 
     return_structure = "_"
     predicted_structure = ""
+    context_table = get_context_table()
     for i in range ( 6, len(arg_amino) - 6 ):
-        predicted_structure = predict_structure(arg_amino[i-6+1:i+6], return_structure[-1])
+        predicted_structure = predict_structure(arg_amino[i-6+1:i+6], return_structure[-1], context_table)
         return_structure += predicted_structure
     
     return return_structure[1:]
@@ -275,6 +730,7 @@ def run_sequence(arg_amino):
 
 # compares two structures, returning how many of the structures are the same
 # the inputs are two structures
+@instrumented("compare_structures")
 def compare_structures(arg_predicted_structures, arg_correct_structures):
 
     hits = 0
@@ -286,15 +742,23 @@ def compare_structures(arg_predicted_structures, arg_correct_structures):
 
 # runs a single test
 # returns the score and number of tries
-def run_full_test(arg_amino_strings, arg_structure_strings):
+@instrumented("run_full_test", count_residues)
+def run_full_test(arg_amino_strings, arg_structure_strings, enable_vectorized=False):
 
     predicted_structures = []
     scores = []
     total_score = 0
     total_tries = 0
 
+    # the encoded engine scores the encoded sequences directly, without turning the predicted structures into strings
+    if not enable_vectorized:
+        amino_codes, structure_codes = encode_sequences(arg_amino_strings, arg_structure_strings)
+        return run_full_test_encoded(amino_codes, structure_codes, get_tables())
+
+    sequence_function = run_sequence_vectorized
+
     for i in range (len(arg_amino_strings)):
-        predicted_structures.append(run_sequence(arg_amino_strings[i]))
+        predicted_structures.append(sequence_function(arg_amino_strings[i]))
 
     for j in range (len(predicted_structures)):
         scores.append([ compare_structures(predicted_structures[j], arg_structure_strings[j]), len(predicted_structures[j]) ])
@@ -307,136 +771,2086 @@ def run_full_test(arg_amino_strings, arg_structure_strings):
 
 # runs a single test
 # returns the predicted structures
-def run_prediction(arg_amino_strings):
+def run_prediction(arg_amino_strings, enable_vectorized=False):
 
     predicted_structures = []
 
+    if enable_vectorized:
+        sequence_function = run_sequence_vectorized
+    else:
+        sequence_function = functools.partial(run_sequence_encoded, arg_tables=get_tables())
+
     for i in range (len(arg_amino_strings)):
-        predicted_structures.append(run_sequence(arg_amino_strings[i]))
+        predicted_structures.append(sequence_function(arg_amino_strings[i]))
 
     return predicted_structures
 
 
-# runs the optimization algorithm for the weights for the coefficients
-# returns the best score, number of tries, and the optimal weights
-def run_optimization(filename, enable_console=True):
+# runs structure predictions on sequences one at a time as they are given, using a prediction cache if given
+# yields the amino acids and the predicted structures of each sequence
+def predict_records(arg_records, enable_vectorized=False, arg_cache=None):
 
-    file_amino_strings, file_structure_strings = read_file(filename, "Input path + name + extension of the input text file for training, or press enter without input to use the default name (\"train.txt\"): ", enable_console)
+    if enable_vectorized:
+        sequence_function = run_sequence_vectorized
+    else:
+        sequence_function = functools.partial(run_sequence_encoded, arg_tables=get_tables())
 
-    weight_list = [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1]
-    global helix_formers
-    global helix_high_indiff
-    global helix_breakers
-    global helix_indiff
-    global sheet_formers
-    global sheet_breakers
-    global sheet_indiff
+    if arg_cache is None:
+        for amino_string, structure_string in arg_records:
+            yield amino_string, sequence_function(amino_string)
+        return
 
-    current_score = 0
-    best_score = 0
+    fingerprint = weights_fingerprint()
+    for amino_string, structure_string in arg_records:
+        predicted_structure = arg_cache.get(amino_string, fingerprint)
+        if predicted_structure is None:
+            predicted_structure = sequence_function(amino_string)
+            arg_cache.put(amino_string, fingerprint, predicted_structure)
+        yield amino_string, predicted_structure
 
-    helix_formers, helix_high_indiff, helix_breakers, helix_indiff, sheet_formers, sheet_breakers, sheet_indiff = create_dicts(weight_list)
 
-    for i in range (1, 4):
-        step = 10**(-i)
+# prediction cache
+# region
 
-        for j in range (len(weight_list)):
+# predicted structures are cached by a hash of the amino acids and a fingerprint of the weights they were predicted with
+# changing any of the weights changes the fingerprint, so structures predicted with other weights are never used
 
-            best_score, tries = run_full_test(file_amino_strings, file_structure_strings)
-            current_score = best_score + 1
-            while current_score > best_score:
-                weight_list[j] += step
-                helix_formers, helix_high_indiff, helix_breakers, helix_indiff, sheet_formers, sheet_breakers, sheet_indiff = create_dicts(weight_list)
-                current_score, tries = run_full_test(file_amino_strings, file_structure_strings)
-                if current_score > best_score:
-                    best_score = current_score
-                else:
-                    weight_list[j] -= step
-                    helix_formers, helix_high_indiff, helix_breakers, helix_indiff, sheet_formers, sheet_breakers, sheet_indiff = create_dicts(weight_list)
+# the cache used by main_run, kept between runs in the same process
+prediction_cache = None
 
-            current_score = best_score + 1
-            while current_score > best_score:
-                weight_list[j] -= step
-                helix_formers, helix_high_indiff, helix_breakers, helix_indiff, sheet_formers, sheet_breakers, sheet_indiff = create_dicts(weight_list)
-                current_score, tries = run_full_test(file_amino_strings, file_structure_strings)
-                if current_score > best_score:
-                    best_score = current_score
-                else:
-                    weight_list[j] += step
-                    helix_formers, helix_high_indiff, helix_breakers, helix_indiff, sheet_formers, sheet_breakers, sheet_indiff = create_dicts(weight_list)
 
-    return best_score, tries, weight_list[:]
+# returns a fingerprint of the current dictionaries, which changes whenever any of the weights change
+def weights_fingerprint():
 
+    return hashlib.sha256(repr(dicts_key()).encode()).hexdigest()
 
-# runs the optimization algorithm for the weights for the coefficients, saving the coefficients to a file
-# returns the best score, number of tries, and the optimal weights
-def main_opt(arg_filename="train.txt", enable_console=True):
 
-    global helix_formers
-    global helix_high_indiff
-    global helix_breakers
-    global helix_indiff
-    global sheet_formers
-    global sheet_breakers
-    global sheet_indiff
+# holds predicted structures in memory, dropping the least recently used ones when it is full
+# if a filename is given, the structures are also saved to a database file, so they can be used again in later runs
+class PredictionCache:
 
-    print()
+    def __init__(self, arg_max_size=10000, arg_filename=None):
 
-    filename = arg_filename
+        self.max_size = arg_max_size
+        self.filename = arg_filename
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.connection = None
 
-    if enable_console:
-        console_filename = input("Input path + name + extension of the input text file for training, or press enter without input to use the default name (\"train.txt\"): ")
-        if console_filename:
-            filename = console_filename
+        if arg_filename:
+            self.connection = sqlite3.connect(arg_filename)
+            self.connection.execute("CREATE TABLE IF NOT EXISTS predictions (key TEXT PRIMARY KEY, structure TEXT)")
 
-    print()
-    print("Optimizing...")
-    print()
-    opt_best_score, opt_tries, weight_list = run_optimization(filename, False)
-    filename_weights = write_weights("weights.txt", weight_list)
-    print()
-    print("Best optimized score: ",  str(opt_best_score).rjust(8))
-    print("Number of amino acids:",  str(opt_tries).rjust(8))
-    print("Success rate:         ", (str(round(opt_best_score*100/opt_tries, 2)) + "%").rjust(8))
-    print()
-    print("Optimized weights successfully written to " + filename_weights)
+    # returns the key of a sequence of amino acids predicted with the weights with the given fingerprint
+    def key(self, arg_amino, arg_fingerprint):
 
-    return opt_best_score, opt_tries, weight_list
+        return hashlib.sha256((arg_fingerprint + ":" + arg_amino).encode("utf-8")).hexdigest()
 
+    # returns the cached predicted structures of a sequence of amino acids, or None if they are not cached
+    def get(self, arg_amino, arg_fingerprint):
 
-# runs the algorithm against a known sequence + structure, writing the success rate to console
-# returns the score and the number of tries
-def main_test(arg_filename="test.txt", enable_console=True):
+        key = self.key(arg_amino, arg_fingerprint)
 
-    global helix_formers
-    global helix_high_indiff
-    global helix_breakers
-    global helix_indiff
-    global sheet_formers
-    global sheet_breakers
-    global sheet_indiff
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
 
-    print()
+        if self.connection is not None:
+            row = self.connection.execute("SELECT structure FROM predictions WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self.hits += 1
+                self.disk_hits += 1
+                self.remember(key, row[0])
+                return row[0]
 
-    helix_formers, helix_high_indiff, helix_breakers, helix_indiff, sheet_formers, sheet_breakers, sheet_indiff = create_dicts_file("weights.txt")
+        self.misses += 1
+        return None
 
-    file_amino_strings, file_structure_strings = read_file(arg_filename, "Input path + name + extension of the input text file for testing, or press enter without input to use the default name (\"test.txt\"): ", enable_console)
-    
-    total_score, total_tries = run_full_test(file_amino_strings, file_structure_strings)
+    # caches the predicted structures of a sequence of amino acids
+    def put(self, arg_amino, arg_fingerprint, arg_structure):
 
-    print()
-    print("Final score in test run:",  str(total_score).rjust(8))
-    print("Number of amino acids:  ",  str(total_tries).rjust(8))
-    print("Success rate:           ", (str(round(total_score*100/total_tries, 2)) + "%").rjust(8))
+        key = self.key(arg_amino, arg_fingerprint)
+        self.remember(key, arg_structure)
 
-    return total_score, total_tries
+        if self.connection is not None:
+            self.connection.execute("INSERT OR REPLACE INTO predictions (key, structure) VALUES (?, ?)", (key, arg_structure))
 
+    # holds predicted structures in memory, dropping the least recently used ones when there are too many
+    def remember(self, arg_key, arg_structure):
 
-# runs the algorithm against a sequence with unknown structure, writing the predicted structures to a file
-# does not return anything
-def main_run(arg_filename="data.txt", enable_console=True):
+        self.entries[arg_key] = arg_structure
+        self.entries.move_to_end(arg_key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
 
-    global helix_formers
+    # saves the new structures to the database file, if there is one
+    def flush(self):
+
+        if self.connection is not None:
+            self.connection.commit()
+
+    # clears the number of cache hits and misses, keeping the cached structures
+    def reset_counts(self):
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # returns a summary of the cache hits and misses
+    def summary(self):
+
+        text = "Prediction cache: " + str(self.hits) + " hits (" + str(self.disk_hits) + " from disk), " + str(self.misses) + " misses"
+        return text
+
+# endregion
+
+
+# encoded sequences
+# region
+
+# sequences can be encoded once as bytes, one byte per amino acid, and the dictionaries turned into lookup tables indexed by those bytes
+# predicting and scoring encoded sequences needs no string slicing and no dictionary lookups for each amino acid
+
+# offsets from the current amino acid that are part of the helix and sheet windows, in the order init_helix and init_sheet add them
+helix_window_offsets = (-5, -4, -3, -2, -1, 0, 2, 3, 4, 5)
+sheet_window_offsets = (-4, -3, -2, -1, 0, 2, 3, 4)
+
+# predicted structures are encoded as state codes: 0 = coil, 1 = helix, 2 = sheet
+# known structures are encoded the same way, with any other symbol (such as the padding) given a code that never matches a prediction
+structure_code_table = bytearray(b"\xff"*256)
+structure_code_table[ord("_")] = 0
+structure_code_table[ord("h")] = 1
+structure_code_table[ord("e")] = 2
+state_symbols = bytes.maketrans(b"\x00\x01\x02", b"_he")
+
+# the lookup tables for the current dictionaries are cached, and only rebuilt when the dictionaries change
+current_tables_key = None
+current_tables = None
+
+
+# encodes a string of amino acids as bytes
+def encode_sequence(arg_amino):
+
+    return arg_amino.encode("latin-1", "replace")
+
+
+# encodes a string of structures as state codes
+def encode_structure(arg_structure):
+
+    return arg_structure.encode("latin-1", "replace").translate(structure_code_table)
+
+
+# encodes the arrays of amino strings and structure strings read by read_file
+# returns two arrays of bytes
+def encode_sequences(arg_amino_strings, arg_structure_strings):
+
+    return [encode_sequence(amino) for amino in arg_amino_strings], [encode_structure(structure) for structure in arg_structure_strings]
+
+
+# returns lookup tables with 256 entries, indexed by the byte value of an amino acid, built from the dictionaries returned by create_dicts
+# the tables hold the helix former, helix breaker, sheet former and sheet breaker values, followed by the context table for the breaker/indifferent sets
+def create_tables_from_dicts(h_formers, h_high_indiff, h_breakers, h_indiff, s_formers, s_breakers, s_indiff):
+
+    h_form  = [0.0]*256
+    h_break = [0.0]*256
+    s_form  = [0.0]*256
+    s_break = [0.0]*256
+
+    # a former and a highly indifferent value never belong to the same amino acid, so adding them together does not change any sums
+    for amino in h_formers:
+        h_form[ord(amino)] += h_formers[amino]
+    for amino in h_high_indiff:
+        h_form[ord(amino)] += h_high_indiff[amino]
+    for amino in h_breakers:
+        h_break[ord(amino)] = h_breakers[amino]
+    for amino in s_formers:
+        s_form[ord(amino)] = s_formers[amino]
+    for amino in s_breakers:
+        s_break[ord(amino)] = s_breakers[amino]
+
+    return h_form, h_break, s_form, s_break, create_context_table(h_breakers, h_indiff, s_breakers, s_indiff)
+
+
+# returns the lookup tables for a list of weights
+def create_tables(arg_weight_list):
+
+    return create_tables_from_dicts(*create_dicts(arg_weight_list))
+
+
+# returns the contents of the current dictionaries as a tuple, which can be compared to see if any of them have changed
+def dicts_key():
+
+    return (tuple(helix_formers.items()), tuple(helix_high_indiff.items()), tuple(helix_breakers.items()), tuple(helix_indiff), tuple(sheet_formers.items()), tuple(sheet_breakers.items()), tuple(sheet_indiff))
+
+
+# returns the lookup tables for the current dictionaries
+def get_tables():
+
+    global current_tables_key
+    global current_tables
+
+    key = dicts_key()
+    if key != current_tables_key:
+        current_tables_key = key
+        current_tables = create_tables_from_dicts(helix_formers, helix_high_indiff, helix_breakers, helix_indiff, sheet_formers, sheet_breakers, sheet_indiff)
+    return current_tables
+
+
+# runs a series of structure predictions on a single encoded sequence, the same way as run_sequence
+# returns the predicted structures as state codes
+def predict_codes(arg_codes, arg_tables):
+
+    n = len(arg_codes) - 12
+    if n <= 0:
+        return bytearray()
+
+    h_form, h_break, s_form, s_break, context_table = arg_tables
+    char_codes, code_map, size, flags = context_table
+    context_codes = bytes(arg_codes).translate(code_map)
+    h_form_values  = [h_form[code] for code in arg_codes]
+    h_break_values = [h_break[code] for code in arg_codes]
+    s_form_values  = [s_form[code] for code in arg_codes]
+    s_break_values = [s_break[code] for code in arg_codes]
+
+    states = bytearray(n)
+    state = 0
+    for i in range (n):
+        p = i + 6
+
+        # the sums are added in the same order as in init_helix and init_sheet, so the floating point results are identical
+        sum_h_form  = 0 + h_form_values[p-5] + h_form_values[p-4] + h_form_values[p-3] + h_form_values[p-2] + h_form_values[p-1] + h_form_values[p] + h_form_values[p+2] + h_form_values[p+3] + h_form_values[p+4] + h_form_values[p+5]
+        sum_h_break = 0 + h_break_values[p-5] + h_break_values[p-4] + h_break_values[p-3] + h_break_values[p-2] + h_break_values[p-1] + h_break_values[p] + h_break_values[p+2] + h_break_values[p+3] + h_break_values[p+4] + h_break_values[p+5]
+        sum_s_form  = 0 + s_form_values[p-4] + s_form_values[p-3] + s_form_values[p-2] + s_form_values[p-1] + s_form_values[p] + s_form_values[p+2] + s_form_values[p+3] + s_form_values[p+4]
+        sum_s_break = 0 + s_break_values[p-4] + s_break_values[p-3] + s_break_values[p-2] + s_break_values[p-1] + s_break_values[p] + s_break_values[p+2] + s_break_values[p+3] + s_break_values[p+4]
+
+        init_h = (sum_h_form >= 8) and (sum_h_break < 4)
+        init_e = (sum_s_form >= 6) and (sum_s_break < 4)
+        if (init_h and init_e):
+            if sum_h_form > sum_s_form:
+                init_e = False
+            else:
+                init_h = False
+
+        if init_h:
+            state = 1
+        elif state == 1 and flags[(context_codes[p]*size + context_codes[p+1])*size + context_codes[p+2]] & cont_helix_flag:
+            state = 1
+        elif init_e:
+            state = 2
+        elif state == 2 and flags[(context_codes[p]*size + context_codes[p+1])*size + context_codes[p+2]] & cont_sheet_flag:
+            state = 2
+        else:
+            state = 0
+        states[i] = state
+
+    return states
+
+
+# runs a series of structure predictions on a single sequence of amino acids using the encoded engine, returning the same string as run_sequence
+# the lookup tables can be given, instead of getting the tables for the current dictionaries for every sequence
+@instrumented("run_sequence_encoded", lambda arg_amino, arg_tables=None: max(len(arg_amino) - 12, 0))
+def run_sequence_encoded(arg_amino, arg_tables=None):
+
+    if arg_tables is None:
+        arg_tables = get_tables()
+    return predict_codes(encode_sequence(arg_amino), arg_tables).translate(state_symbols).decode()
+
+
+# compares predicted state codes to encoded known structures, the same way as compare_structures
+def count_hits(arg_states, arg_structure_codes):
+
+    hits = 0
+    for predicted, correct in zip(arg_states, arg_structure_codes[6:]):
+        hits += predicted == correct
+    return hits
+
+
+# runs a single test on encoded sequences with the given lookup tables, using the vectorized engine if enabled
+# returns the score and number of tries, the same as run_full_test
+@instrumented("run_full_test_encoded", count_residues)
+def run_full_test_encoded(arg_amino_codes, arg_structure_codes, arg_tables, enable_vectorized=False):
+
+    total_score = 0
+    total_tries = 0
+
+    if enable_vectorized and np is not None:
+        vector_tables = create_vector_tables(arg_tables)
+        for i in range (len(arg_amino_codes)):
+            states = predict_codes_vectorized(arg_amino_codes[i], vector_tables)
+            total_score += count_hits_vectorized(states, arg_structure_codes[i])
+            total_tries += len(states)
+    else:
+        for i in range (len(arg_amino_codes)):
+            states = predict_codes(arg_amino_codes[i], arg_tables)
+            total_score += count_hits(states, arg_structure_codes[i])
+            total_tries += len(states)
+
+    return total_score, total_tries
+
+# endregion
+
+
+# binary corpus
+# region
+
+# a corpus of sequences can be converted once to a binary file, which is then memory-mapped instead of parsing the text file again
+# the file holds a header, the encoded amino acids of every sequence, the encoded structures of every sequence, and an index of where each sequence starts
+# the sequences are stored with their padding, and the structures are padded to the same length as the amino acids with a code that never matches a prediction
+# several processes mapping the same file share the same memory, and only the parts that are used are read from disk
+
+# the header: a magic string, the number of sequences, the total number of amino acids, and the size, modification time and SHA-256 hash of the text file
+corpus_magic = b"MOLCORP1"
+corpus_header = struct.Struct("<8sQQQq32s")
+
+
+# returns the SHA-256 hash of a file
+def file_hash(arg_filename):
+
+    digest = hashlib.sha256()
+    with open(arg_filename, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.digest()
+
+
+# converts a text file with sequences to a binary corpus file, reading one sequence at a time
+# the file is written under a temporary name and then renamed, so other processes never see a partly written file
+# returns the filename of the binary corpus
+def write_corpus(arg_filename, arg_corpus_filename=None):
+
+    corpus_filename = arg_corpus_filename or arg_filename + ".corpus"
+    temporary_filename = corpus_filename + "." + str(getpid()) + ".tmp"
+    source_stat = stat(arg_filename)
+    source_hash = file_hash(arg_filename)
+
+    offsets = [0]
+    with open(temporary_filename, "wb") as f, tempfile.TemporaryFile() as labels:
+
+        f.write(b"\0"*corpus_header.size)
+        for amino_string, structure_string in read_records(arg_filename):
+            amino_codes = encode_sequence(amino_string)
+            structure_codes = encode_structure(structure_string)[:len(amino_codes)]
+            f.write(amino_codes)
+            labels.write(structure_codes + b"\xff"*(len(amino_codes) - len(structure_codes)))
+            offsets.append(offsets[-1] + len(amino_codes))
+
+        labels.seek(0)
+        shutil.copyfileobj(labels, f)
+        f.write(struct.pack("<" + str(len(offsets)) + "Q", *offsets))
+
+        f.seek(0)
+        f.write(corpus_header.pack(corpus_magic, len(offsets) - 1, offsets[-1], source_stat.st_size, source_stat.st_mtime_ns, source_hash))
+
+    replace(temporary_filename, corpus_filename)
+    return corpus_filename
+
+
+# a binary corpus file, memory-mapped so the sequences can be used without copying them
+# the file is closed by close, or at the end of a with statement
+class Corpus:
+
+    def __init__(self, arg_corpus_filename):
+
+        self.filename = arg_corpus_filename
+        self.map = None
+        self.residues = None
+        self.labels = None
+        self.offsets = None
+        self.file = open(arg_corpus_filename, "rb")
+
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.load()
+        except BaseException:
+            self.close()
+            raise
+
+    # reads the header and index of the file, and checks that the file is as long as the header says
+    def load(self):
+
+        magic, count, total_length, source_size, source_mtime, source_hash = corpus_header.unpack_from(self.map, 0)
+        if magic != corpus_magic:
+            raise ValueError(self.filename + " is not a binary corpus file")
+        if len(self.map) != corpus_header.size + 2*total_length + 8*(count + 1):
+            raise ValueError(self.filename + " is truncated or corrupt")
+
+        self.count = count
+        self.source_size = source_size
+        self.source_mtime = source_mtime
+        self.source_hash = source_hash
+
+        view = memoryview(self.map)
+        start = corpus_header.size
+        self.residues = view[start:start + total_length]
+        self.labels = view[start + total_length:start + 2*total_length]
+        offsets = view[start + 2*total_length:start + 2*total_length + 8*(count + 1)]
+        if sys.byteorder == "little":
+            self.offsets = offsets.cast("Q")
+        else:
+            self.offsets = struct.unpack("<" + str(count + 1) + "Q", offsets)
+
+    def __len__(self):
+
+        return self.count
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, *args):
+
+        self.close()
+
+    # closes the file
+    # the map can only be closed once no sequences returned by the corpus are in use, otherwise it is closed when the last of them is no longer used
+    def close(self):
+
+        for view in (self.residues, self.labels, self.offsets):
+            if isinstance(view, memoryview):
+                view.release()
+        self.residues = self.labels = self.offsets = None
+
+        if self.map is not None:
+            try:
+                self.map.close()
+            except BufferError:
+                pass
+        self.file.close()
+
+    # determines if the corpus was converted from the current version of a text file
+    # the size and modification time are compared first, and the hash only if the modification time differs
+    def is_fresh(self, arg_filename):
+
+        source_stat = stat(arg_filename)
+        if source_stat.st_size != self.source_size:
+            return False
+        if source_stat.st_mtime_ns == self.source_mtime:
+            return True
+        return file_hash(arg_filename) == self.source_hash
+
+    # returns the encoded amino acids and encoded structures of the sequence at the given index, as views into the file
+    def sequence(self, i):
+
+        start = self.offsets[i]
+        end = self.offsets[i + 1]
+        return self.residues[start:end], self.labels[start:end]
+
+    # returns two arrays holding the encoded amino acids and encoded structures of every sequence, the same as encode_sequences
+    def sequences(self):
+
+        amino_codes = []
+        structure_codes = []
+        for i in range (self.count):
+            amino, structure = self.sequence(i)
+            amino_codes.append(amino)
+            structure_codes.append(structure)
+        return amino_codes, structure_codes
+
+
+# returns the binary corpus for a text file with sequences, converting the text file first if there is no corpus, or if it is out of date
+def open_corpus(arg_filename, arg_corpus_filename=None):
+
+    corpus_filename = arg_corpus_filename or arg_filename + ".corpus"
+
+    # a corpus that is out of date is closed before it is replaced
+    if path.exists(corpus_filename):
+        try:
+            corpus = Corpus(corpus_filename)
+        except (ValueError, struct.error):
+            pass
+        else:
+            if corpus.is_fresh(arg_filename):
+                return corpus
+            corpus.close()
+
+    return Corpus(write_corpus(arg_filename, corpus_filename))
+
+
+# gets encoded data for training or testing from a file, the same as encoding the arrays returned by read_file
+# with a binary corpus, the data is memory-mapped from the binary corpus of the file instead, which is created or updated as needed
+def read_file_encoded(arg_filename, input_string, enable_console=True, enable_binary_corpus=False):
+
+    filename = arg_filename
+
+    if enable_console:
+        console_filename = input(input_string)
+        if console_filename:
+            filename = console_filename
+
+    # the sequences stay mapped after the corpus is closed, for as long as they are used
+    if enable_binary_corpus:
+        with open_corpus(filename) as corpus:
+            return corpus.sequences()
+    return encode_sequences(*read_file(filename, input_string, False))
+
+# endregion
+
+
+# vectorized prediction engine
+# region
+
+# the engine computes every window sum of a sequence at once with numpy, and only runs the short h/e/_ state machine as a loop
+# the sums are added offset by offset in the same order as init_helix and init_sheet, so the floating point results are identical
+
+# the numpy versions of the lookup tables for the current dictionaries are cached, and only rebuilt when those tables change
+current_vector_tables_source = None
+current_vector_tables = None
+
+
+# returns numpy arrays of the lookup tables returned by create_tables
+# the context table is returned as its byte translation table, its number of codes, and its bit flags
+def create_vector_tables(arg_tables):
+
+    h_form, h_break, s_form, s_break, context_table = arg_tables
+    char_codes, code_map, size, flags = context_table
+    return np.array(h_form), np.array(h_break), np.array(s_form), np.array(s_break), np.frombuffer(code_map, dtype=np.uint8), size, np.frombuffer(flags, dtype=np.uint8)
+
+
+# returns the numpy arrays of the lookup tables for the current dictionaries
+def get_vector_tables():
+
+    global current_vector_tables_source
+    global current_vector_tables
+
+    tables = get_tables()
+    if tables is not current_vector_tables_source:
+        current_vector_tables_source = tables
+        current_vector_tables = create_vector_tables(tables)
+    return current_vector_tables
+
+
+# returns the sum of a value array over a window around each of the n amino acids being predicted, adding the offsets in order
+def window_sums(arg_values, arg_offsets, n):
+
+    sums = np.zeros(n)
+    for offset in arg_offsets:
+        sums += arg_values[6+offset:6+offset+n]
+    return sums
+
+
+# vectorized version of predict_codes, returning exactly the same state codes
+def predict_codes_vectorized(arg_codes, arg_vector_tables):
+
+    n = len(arg_codes) - 12
+    if n <= 0:
+        return bytearray()
+
+    h_form, h_break, s_form, s_break, code_map, size, flags = arg_vector_tables
+    codes = np.frombuffer(arg_codes, dtype=np.uint8)
+
+    # the structure of the amino acid at position i is decided by the window around position i + 1
+    sum_h_form  = window_sums(h_form[codes], helix_window_offsets, n)
+    sum_h_break = window_sums(h_break[codes], helix_window_offsets, n)
+    sum_s_form  = window_sums(s_form[codes], sheet_window_offsets, n)
+    sum_s_break = window_sums(s_break[codes], sheet_window_offsets, n)
+
+    init_h = (sum_h_form >= 8) & (sum_h_break < 4)
+    init_e = (sum_s_form >= 6) & (sum_s_break < 4)
+    both = init_h & init_e
+    h_wins = sum_h_form > sum_s_form
+    init_h, init_e = init_h & ~(both & ~h_wins), init_e & ~(both & h_wins)
+
+    # the continue/terminate decisions look at the three amino acids starting at the current one, the middle one being the deciding one
+    context_codes = code_map[codes].astype(np.intp)
+    decisions = flags[(context_codes[6:6+n]*size + context_codes[7:7+n])*size + context_codes[8:8+n]]
+    cont_h = (decisions & cont_helix_flag) != 0
+    cont_e = (decisions & cont_sheet_flag) != 0
+
+    # the next state for each of the three possible previous states
+    next_from_coil  = np.where(init_h, 1, np.where(init_e, 2, 0)).tolist()
+    next_from_helix = np.where(init_h | cont_h, 1, np.where(init_e, 2, 0)).tolist()
+    next_from_sheet = np.where(init_h, 1, np.where(init_e | cont_e, 2, 0)).tolist()
+    next_state = (next_from_coil, next_from_helix, next_from_sheet)
+
+    states = bytearray(n)
+    state = 0
+    for i in range (n):
+        state = next_state[state][i]
+        states[i] = state
+
+    return states
+
+
+# vectorized version of count_hits
+def count_hits_vectorized(arg_states, arg_structure_codes):
+
+    n = min(len(arg_states), len(arg_structure_codes) - 6)
+    if n <= 0:
+        return 0
+    return int(np.count_nonzero(np.frombuffer(arg_states, dtype=np.uint8)[:n] == np.frombuffer(arg_structure_codes, dtype=np.uint8)[6:6+n]))
+
+
+# vectorized version of run_sequence, returning exactly the same string of structures
+# the input is a string of amino acids of any length, padded the same way as for run_sequence
+@instrumented("run_sequence_vectorized", lambda arg_amino: max(len(arg_amino) - 12, 0))
+def run_sequence_vectorized(arg_amino):
+
+    # without numpy, the encoded engine gives the same result
+    if np is None:
+        return run_sequence_encoded(arg_amino)
+
+    return predict_codes_vectorized(encode_sequence(arg_amino), get_vector_tables()).translate(state_symbols).decode()
+
+# endregion
+
+
+# population evaluation
+# region
+
+# many lists of weights can be scored at once, with every window sum for every list computed together as one 2-D numpy array
+# the sums are added offset by offset in the same order as init_helix and init_sheet, so every score is identical to a full test
+# the structure prediction runs as a single loop over the amino acids, advancing the states for every list of weights and every sequence in a chunk together
+
+# scores many lists of weights against the same encoded training data
+# the sequences are sorted by length and grouped into chunks once, so each call to score only does the numpy work
+# a chunk holds at most about the given number of amino acids, counting the shorter sequences as if they were as long as the longest one
+class PopulationEvaluator:
+
+    def __init__(self, arg_amino_codes, arg_structure_codes, arg_chunk_size=20000):
+
+        self.amino_codes = arg_amino_codes
+        self.structure_codes = arg_structure_codes
+        self.tries = 0
+        self.chunks = []
+
+        for codes in arg_amino_codes:
+            self.tries += max(len(codes) - 12, 0)
+        if np is None:
+            return
+
+        chunk = []
+        for i in sorted(range (len(arg_amino_codes)), key=lambda i: len(arg_amino_codes[i])):
+            if len(arg_amino_codes[i]) <= 12:
+                continue
+            if chunk and (len(arg_amino_codes[i]) - 12)*(len(chunk) + 1) > arg_chunk_size:
+                self.chunks.append(self.create_chunk(chunk))
+                chunk = []
+            chunk.append(i)
+        if chunk:
+            self.chunks.append(self.create_chunk(chunk))
+
+    # joins a list of sequences into a single array of codes
+    # returns the codes, the position of the window deciding each predicted structure, the step and sequence of each predicted structure in the chunk, and the correct structure codes
+    def create_chunk(self, arg_indices):
+
+        codes = []
+        positions = []
+        steps = []
+        columns = []
+        correct = []
+        base = 0
+
+        for column in range (len(arg_indices)):
+            amino_codes = bytes(self.amino_codes[arg_indices[column]])
+            structure_codes = bytes(self.structure_codes[arg_indices[column]])
+            n = len(amino_codes) - 12
+
+            positions.append(np.arange(base + 6, base + 6 + n))
+            steps.append(np.arange(n))
+            columns.append(np.full(n, column))
+            # the structures are compared the same way as count_hits, and a structure code of 255 never matches a prediction
+            correct.append(structure_codes[6:6+n].ljust(n, b"\xff"))
+
+            codes.append(amino_codes)
+            base += len(amino_codes)
+
+        return np.frombuffer(b"".join(codes), dtype=np.uint8), np.concatenate(positions), np.concatenate(steps), np.concatenate(columns), np.frombuffer(b"".join(correct), dtype=np.uint8)
+
+    # scores each list of weights, the same as score_weights would
+    # returns a list of the score and number of tries for each list of weights
+    @instrumented("population_score")
+    def score(self, arg_weight_lists):
+
+        tables = [create_tables(weight_list) for weight_list in arg_weight_lists]
+        if not tables:
+            return []
+
+        # without numpy, each list of weights is scored with the encoded engine instead
+        if np is None:
+            return [run_full_test_encoded(self.amino_codes, self.structure_codes, table) for table in tables]
+
+        k = len(tables)
+        char_codes, code_map, size, flags = tables[0][4]
+        code_map = np.frombuffer(code_map, dtype=np.uint8)
+        flags = np.frombuffer(flags, dtype=np.uint8)
+
+        # a column of values for each list of weights, for each of the four tables
+        value_tables = [np.array([table[t] for table in tables]).T for t in range (4)]
+        scores = np.zeros(k, dtype=np.int64)
+
+        for codes, positions, steps, columns, correct in self.chunks:
+
+            # the sums are found for the windows around every amino acid, including the padding between sequences, and the deciding windows are picked out after
+            n = len(positions)
+            sums = []
+            for t, offsets in enumerate((helix_window_offsets, helix_window_offsets, sheet_window_offsets, sheet_window_offsets)):
+                values = value_tables[t][codes]
+                table_sums = np.zeros((len(codes) - 12, k))
+                for offset in offsets:
+                    table_sums += values[6+offset:len(codes)-6+offset]
+                sums.append(table_sums[positions - 6])
+            sum_h_form, sum_h_break, sum_s_form, sum_s_break = sums
+
+            init_h = (sum_h_form >= 8) & (sum_h_break < 4)
+            init_e = (sum_s_form >= 6) & (sum_s_break < 4)
+            both = init_h & init_e
+            h_wins = sum_h_form > sum_s_form
+            init_h, init_e = init_h & ~(both & ~h_wins), init_e & ~(both & h_wins)
+
+            context_codes = code_map[codes].astype(np.intp)
+            decisions = flags[(context_codes[positions]*size + context_codes[positions + 1])*size + context_codes[positions + 2]]
+            cont_h = ((decisions & cont_helix_flag) != 0)[:, None]
+            cont_e = ((decisions & cont_sheet_flag) != 0)[:, None]
+
+            # the next state for each of the three possible previous states, the same way as predict_codes_vectorized
+            # these are laid out by step, sequence, previous state and list of weights, and the steps past the end of a shorter sequence are never counted
+            sequence_count = columns[-1] + 1
+            next_state = np.zeros((steps.max() + 1, sequence_count, 3, k), dtype=np.uint8)
+            next_state[steps, columns, 0] = np.where(init_h, 1, np.where(init_e, 2, 0))
+            next_state[steps, columns, 1] = np.where(init_h | cont_h, 1, np.where(init_e, 2, 0))
+            next_state[steps, columns, 2] = np.where(init_h, 1, np.where(init_e | cont_e, 2, 0))
+
+            sequence_index = np.arange(sequence_count)[:, None]
+            weight_index = np.arange(k)[None, :]
+            states = np.empty((len(next_state), sequence_count, k), dtype=np.uint8)
+            state = np.zeros((sequence_count, k), dtype=np.intp)
+            for i in range (len(next_state)):
+                state = next_state[i][sequence_index, state, weight_index]
+                states[i] = state
+
+            scores += np.count_nonzero(states[steps, columns] == correct[:, None], axis=0)
+
+        return [(int(score), self.tries) for score in scores]
+
+# endregion
+
+
+# incremental evaluation for the optimization algorithm
+# region
+
+# a single weight only changes the value of one amino acid in one of the sums, so only the windows containing that amino acid need to be recomputed
+# the sums are recomputed from scratch in the same order as init_helix and init_sheet, so the scores are identical to a full test
+
+# the lookup table and amino acid that each weight in the weight list adjusts, in the same order as create_dicts
+# the tables are the helix former (0), helix breaker (1), sheet former (2) and sheet breaker (3) tables returned by create_tables
+weight_targets = [(0, "E"), (0, "A"), (0, "L"), (0, "H"), (0, "M"), (0, "Q"), (0, "W"), (0, "V"), (0, "F"),
+                  (0, "K"), (0, "I"),
+                  (1, "N"), (1, "Y"), (1, "P"), (1, "G"),
+                  (2, "M"), (2, "V"), (2, "I"), (2, "C"), (2, "Y"), (2, "F"), (2, "Q"), (2, "L"), (2, "T"), (2, "W"),
+                  (3, "K"), (3, "S"), (3, "H"), (3, "N"), (3, "P"), (3, "E")]
+
+# the thresholds of the helix former (>= 8), helix breaker (< 4), sheet former (>= 6) and sheet breaker (< 4) sums, in the same order as the tables
+sum_thresholds = (8, 4, 6, 4)
+
+# breakpoints closer than this are treated as the same breakpoint by the line search, since rounding can put a window sum on either side of its threshold between them
+breakpoint_tolerance = 1e-9
+
+
+# returns the code of the structure started by a window with the given sums, the same way as init_helix, init_sheet and predict_structure
+# 1 starts a helix, 2 starts a sheet, and 0 starts neither
+def init_code(arg_score_h, arg_break_h, arg_score_e, arg_break_e):
+
+    init_h = (arg_score_h >= 8) and (arg_break_h < 4)
+    init_e = (arg_score_e >= 6) and (arg_break_e < 4)
+
+    if (init_h and init_e):
+        if arg_score_h > arg_score_e:
+            init_e = False
+        else:
+            init_h = False
+
+    if init_h:
+        return 1
+    elif init_e:
+        return 2
+    return 0
+
+
+# vectorized version of init_code, for numpy arrays of sums
+def init_codes_vectorized(arg_score_h, arg_break_h, arg_score_e, arg_break_e):
+
+    init_h = (arg_score_h >= 8) & (arg_break_h < 4)
+    init_e = (arg_score_e >= 6) & (arg_break_e < 4)
+    both = init_h & init_e
+    h_wins = arg_score_h > arg_score_e
+    return np.where(init_h & ~(both & ~h_wins), 1, np.where(init_e & ~(both & h_wins), 2, 0))
+
+
+# returns the shortest decimal number in the middle half of the interval between two numbers, or the number halfway between them if there is none
+# short decimal numbers are where window sums tie or land on their thresholds, so one just past a breakpoint that is off by rounding could be the breakpoint itself
+def interval_representative(arg_low, arg_high):
+
+    low, high = min(arg_low, arg_high), max(arg_low, arg_high)
+    margin = (high - low) / 4
+    for digits in range (16):
+        representative = round((low + high) / 2, digits)
+        if low + margin <= representative <= high - margin:
+            return representative
+    return (low + high) / 2
+
+
+# holds the window sums, predicted structures and hits for every amino acid in a set of encoded sequences
+# changing a weight only recomputes the affected windows, and runs the structure prediction from there until it matches the previous prediction again
+class IncrementalEvaluator:
+
+    sum_offsets = (helix_window_offsets, helix_window_offsets, sheet_window_offsets, sheet_window_offsets)
+
+    def __init__(self, arg_amino_codes, arg_structure_codes, arg_weight_list):
+
+        self.weight_list = list(arg_weight_list)
+        self.tables = create_tables(self.weight_list)
+        self.sequences = []
+        self.total_score = 0
+        self.total_tries = 0
+
+        for i in range (len(arg_amino_codes)):
+            self.sequences.append(self.create_sequence(arg_amino_codes[i], arg_structure_codes[i]))
+
+        if np is not None:
+            self.create_arrays()
+
+    # returns the cached data for a single sequence, predicting its structures the same way as predict_codes
+    def create_sequence(self, arg_codes, arg_structure_codes):
+
+        n = max(len(arg_codes) - 12, 0)
+        sequence = {"codes" : arg_codes, "structure" : arg_structure_codes, "n" : n, "positions" : {}}
+
+        # the positions of each amino acid, so the windows containing it can be found
+        for p in range (len(arg_codes)):
+            sequence["positions"].setdefault(arg_codes[p], []).append(p)
+
+        sequence["sums"] = [[self.window_sum(arg_codes, table, i) for i in range (n)] for table in range (4)]
+
+        # continuing and terminating do not depend on the weights, only on which amino acids are breakers and indifferent
+        char_codes, code_map, size, flags = self.tables[4]
+        context_codes = bytes(arg_codes).translate(code_map)
+        decisions = [flags[(context_codes[i+6]*size + context_codes[i+7])*size + context_codes[i+8]] for i in range (n)]
+        sequence["cont_h"] = [bool(decision & cont_helix_flag) for decision in decisions]
+        sequence["cont_e"] = [bool(decision & cont_sheet_flag) for decision in decisions]
+
+        states = []
+        hits = []
+        state = 0
+        for i in range (n):
+            state = self.next_state(sequence, i, state)
+            states.append(state)
+            hits.append(self.is_hit(sequence, i, state))
+        sequence["states"] = states
+        sequence["hits"] = hits
+
+        self.total_score += sum(hits)
+        self.total_tries += n
+        return sequence
+
+    # joins the amino acids and window sums of every sequence into single numpy arrays, so the changed windows can be recomputed all at once
+    # the window sums of each sequence become views into the joined sums, so they are always the same
+    def create_arrays(self):
+
+        self.codes = np.frombuffer(b"".join(bytes(sequence["codes"]) for sequence in self.sequences), dtype=np.uint8)
+        self.window_indices = np.full(len(self.codes), -1, dtype=np.intp)
+        self.window_sequences = []
+        self.window_positions = []
+        self.changed_windows = {}
+
+        start = 0
+        window = 0
+        for s in range (len(self.sequences)):
+            n = self.sequences[s]["n"]
+            self.window_indices[start+6:start+6+n] = np.arange(window, window + n)
+            self.window_sequences += [s]*n
+            self.window_positions += range (n)
+            start += len(self.sequences[s]["codes"])
+            window += n
+        self.window_sequences = np.array(self.window_sequences, dtype=np.intp)
+        self.window_positions = np.array(self.window_positions, dtype=np.intp)
+        self.window_centers = np.flatnonzero(self.window_indices >= 0)
+
+        self.sums = [np.array([window_sum for sequence in self.sequences for window_sum in sequence["sums"][table]]) for table in range (4)]
+        window = 0
+        for sequence in self.sequences:
+            sequence["sums"] = [table_sums[window:window+sequence["n"]] for table_sums in self.sums]
+            window += sequence["n"]
+
+    # returns the windows containing the amino acid a weight adjusts, and the codes at each offset of those windows, in the order of the offsets
+    # these only depend on the amino acid and the offsets, so they are found once for each weight
+    def find_changed_windows(self, arg_index):
+
+        if arg_index not in self.changed_windows:
+            table, amino = weight_targets[arg_index]
+            positions = np.flatnonzero(self.codes == ord(amino))
+            windows = self.window_indices[(positions[:, None] - np.array(self.sum_offsets[table])[None, :]).ravel()]
+            windows = np.unique(windows[windows >= 0])
+            centers = self.window_centers[windows]
+            self.changed_windows[arg_index] = windows, [self.codes[centers + offset] for offset in self.sum_offsets[table]]
+        return self.changed_windows[arg_index]
+
+    # returns the sum over the given table for the window deciding the structure at index i of the predicted structure
+    def window_sum(self, arg_codes, arg_table, i):
+
+        values = self.tables[arg_table]
+        window_sum = 0
+        for offset in self.sum_offsets[arg_table]:
+            window_sum += values[arg_codes[i+6+offset]]
+        return window_sum
+
+    # determines the state code at index i of the predicted structure, the same way as predict_structure
+    # the code of the structure started by the window can be given, instead of finding it from the sums
+    def next_state(self, arg_sequence, i, arg_state, arg_init_code=None):
+
+        if arg_init_code is None:
+            sums = arg_sequence["sums"]
+            arg_init_code = init_code(sums[0][i], sums[1][i], sums[2][i], sums[3][i])
+
+        if arg_init_code == 1 or (arg_sequence["cont_h"][i] and arg_state == 1):
+            return 1
+        elif arg_init_code == 2 or (arg_sequence["cont_e"][i] and arg_state == 2):
+            return 2
+        return 0
+
+    # determines if the predicted state code at index i is the same as the correct one, the same way as compare_structures
+    def is_hit(self, arg_sequence, i, arg_state):
+
+        if i + 6 < len(arg_sequence["structure"]):
+            return int(arg_state == arg_sequence["structure"][i + 6])
+        return 0
+
+    # returns the current score and number of tries, the same as run_full_test would
+    def score(self):
+
+        return self.total_score, self.total_tries
+
+    # changes a single weight, updating only the parts of the predictions affected by it
+    # returns the new score and number of tries
+    @instrumented("incremental_set_weight")
+    def set_weight(self, arg_index, arg_weight):
+
+        if self.weight_list[arg_index] == arg_weight:
+            return self.score()
+
+        self.weight_list[arg_index] = arg_weight
+        self.tables = create_tables(self.weight_list)
+        if np is not None:
+            return self.set_weight_vectorized(arg_index)
+        table, amino = weight_targets[arg_index]
+        offsets = self.sum_offsets[table]
+
+        for sequence in self.sequences:
+
+            n = sequence["n"]
+            changed = set()
+            for p in sequence["positions"].get(ord(amino), []):
+                for offset in offsets:
+                    if 0 <= p - offset - 6 < n:
+                        changed.add(p - offset - 6)
+            if not changed:
+                continue
+
+            sums = sequence["sums"][table]
+            for i in changed:
+                sums[i] = self.window_sum(sequence["codes"], table, i)
+
+            # predicts again from the first changed window, until past the last changed window and back on the previous prediction
+            last_changed = max(changed)
+            states = sequence["states"]
+            hits = sequence["hits"]
+            i = min(changed)
+            if i > 0:
+                state = states[i-1]
+            else:
+                state = 0
+            while i < n:
+                state = self.next_state(sequence, i, state)
+                if state == states[i] and i >= last_changed:
+                    break
+                if state != states[i]:
+                    hit = self.is_hit(sequence, i, state)
+                    self.total_score += hit - hits[i]
+                    hits[i] = hit
+                    states[i] = state
+                i += 1
+
+        return self.score()
+
+    # vectorized version of set_weight, once the weight and tables are changed
+    # the changed windows are recomputed all at once, adding the offsets in the same order as window_sum, and only the windows that start a different structure are predicted again
+    def set_weight_vectorized(self, arg_index):
+
+        table = weight_targets[arg_index][0]
+        windows, offset_codes = self.find_changed_windows(arg_index)
+        values = np.array(self.tables[table])
+
+        window_sums = np.zeros(len(windows))
+        for codes in offset_codes:
+            window_sums += values[codes]
+
+        sums = self.sums
+        previous_codes = init_codes_vectorized(sums[0][windows], sums[1][windows], sums[2][windows], sums[3][windows])
+        sums[table][windows] = window_sums
+        new_codes = init_codes_vectorized(sums[0][windows], sums[1][windows], sums[2][windows], sums[3][windows])
+        flipped = windows[previous_codes != new_codes]
+
+        # predicts again from each window starting a different structure, until back on the previous prediction
+        # the windows are in order, so a window already predicted again from an earlier window is skipped
+        last_sequence = -1
+        done = 0
+        for s, i in zip(self.window_sequences[flipped].tolist(), self.window_positions[flipped].tolist()):
+            if s == last_sequence and i < done:
+                continue
+            sequence = self.sequences[s]
+            n = sequence["n"]
+            states = sequence["states"]
+            hits = sequence["hits"]
+            if i > 0:
+                state = states[i-1]
+            else:
+                state = 0
+            while i < n:
+                state = self.next_state(sequence, i, state)
+                if state == states[i]:
+                    break
+                hit = self.is_hit(sequence, i, state)
+                self.total_score += hit - hits[i]
+                hits[i] = hit
+                states[i] = state
+                i += 1
+            last_sequence = s
+            done = i + 1
+
+        return self.score()
+
+    # finds the best value for a single weight between a lower and an upper bound, without changing the weight
+    # the score only changes where a window sum containing the amino acid crosses its threshold, or where the helix and sheet former sums are equal
+    # the score is therefore found once for each interval between these breakpoints, sweeping outwards from the current weight
+    # returns the best weight and its score, which are the current weight and score if no interval is better
+    @instrumented("line_search")
+    def line_search(self, arg_index, arg_low, arg_high):
+
+        table, amino = weight_targets[arg_index]
+        weight = self.weight_list[arg_index]
+        coefficient = create_tables([1]*len(weight_targets))[table][ord(amino)]
+        offsets = self.sum_offsets[table]
+
+        # each window containing the amino acid changes its sum by the coefficient for every time the amino acid is in it
+        up_events = []
+        down_events = []
+        for s in range (len(self.sequences)):
+            sequence = self.sequences[s]
+            n = sequence["n"]
+            counts = {}
+            for p in sequence["positions"].get(ord(amino), []):
+                for offset in offsets:
+                    if 0 <= p - offset - 6 < n:
+                        counts[p - offset - 6] = counts.get(p - offset - 6, 0) + 1
+
+            # with numpy, the sums are views into numpy arrays, and are read as plain numbers instead, since numpy numbers are much slower to round
+            sums = [table_sums if isinstance(table_sums, list) else table_sums.tolist() for table_sums in sequence["sums"]]
+            for i in counts:
+                slope = counts[i]*coefficient
+                crossings = [sum_thresholds[table]]
+                if table == 0:
+                    crossings.append(sums[2][i])
+                elif table == 2:
+                    crossings.append(sums[0][i])
+                for crossing in crossings:
+                    breakpoint = weight + (crossing - sums[table][i]) / slope
+                    if weight < breakpoint < arg_high:
+                        up_events.append((breakpoint, s, i, slope))
+                    elif arg_low < breakpoint <= weight:
+                        down_events.append((breakpoint, s, i, slope))
+
+        up_events.sort()
+        down_events.sort(reverse=True)
+
+        best_weight, best_score = weight, self.total_score
+        for events, bound in ((up_events, arg_high), (down_events, arg_low)):
+            for candidate_weight, candidate_score in self.sweep_line(table, weight, events, bound):
+                if candidate_score > best_score:
+                    best_weight, best_score = candidate_weight, candidate_score
+
+        return float(best_weight), best_score
+
+    # sweeps a single weight from its current value towards a bound, through the breakpoints in the order they are reached
+    # at each breakpoint, only the windows crossing it are decided again, and the prediction is only redone until it matches the previous prediction again
+    # the cached predictions are not changed, the sweep keeps its own copies of the predictions it changes
+    # returns a list of a weight inside each interval after a breakpoint, and the score for that interval
+    def sweep_line(self, arg_table, arg_weight, arg_events, arg_bound):
+
+        changes = {}
+        score = self.total_score
+        results = []
+
+        # windows whose decision did not change just past their breakpoint, which may be rounding, so they are decided again at the next breakpoints close by
+        pending = []
+
+        k = 0
+        while k < len(arg_events):
+
+            breakpoint = arg_events[k][0]
+            group = []
+            while k < len(arg_events) and arg_events[k][0] == breakpoint:
+                group.append(arg_events[k])
+                k += 1
+            if k < len(arg_events):
+                next_breakpoint = arg_events[k][0]
+            else:
+                next_breakpoint = arg_bound
+            representative = interval_representative(breakpoint, next_breakpoint)
+
+            group = [event for event in pending if abs(breakpoint - event[0]) < breakpoint_tolerance] + group
+            pending = []
+
+            for event in group:
+
+                s, i, slope = event[1:]
+
+                sequence = self.sequences[s]
+                if s not in changes:
+                    changes[s] = (sequence["states"][:], sequence["hits"][:], {})
+                states, hits, codes = changes[s]
+
+                window_sums = [table_sums[i] for table_sums in sequence["sums"]]
+                window_sums[arg_table] += slope*(representative - arg_weight)
+                code = init_code(*window_sums)
+                if code == codes.get(i, init_code(*[table_sums[i] for table_sums in sequence["sums"]])):
+                    pending.append(event)
+                    continue
+                codes[i] = code
+
+                n = sequence["n"]
+                j = i
+                if j > 0:
+                    state = states[j-1]
+                else:
+                    state = 0
+                while j < n:
+                    if j in codes:
+                        state = self.next_state(sequence, j, state, codes[j])
+                    else:
+                        state = self.next_state(sequence, j, state)
+                    if state == states[j] and j >= i:
+                        break
+                    if state != states[j]:
+                        hit = self.is_hit(sequence, j, state)
+                        score += hit - hits[j]
+                        hits[j] = hit
+                        states[j] = state
+                    j += 1
+
+            # intervals too short to tell which side of a breakpoint each window is on are not used
+            if abs(next_breakpoint - breakpoint) >= breakpoint_tolerance:
+                results.append((representative, score))
+
+        return results
+
+# endregion
+
+
+# sets the dictionaries to the given weights, and scores them against the encoded training data
+# with an incremental evaluator, only the weight at the given index is updated in the evaluator instead of running a full test
+# without one, and with a dictionary of scores by list of weights, a list of weights that has been scored before is not scored again
+# returns the score and number of tries
+@instrumented("score_weights")
+def score_weights(arg_amino_codes, arg_structure_codes, arg_weight_list, arg_index=None, arg_evaluator=None, arg_memo=None):
+
+    global helix_formers
+    global helix_high_indiff
+    global helix_breakers
+    global helix_indiff
+    global sheet_formers
+    global sheet_breakers
+    global sheet_indiff
+
+    helix_formers, helix_high_indiff, helix_breakers, helix_indiff, sheet_formers, sheet_breakers, sheet_indiff = create_dicts(arg_weight_list)
+
+    if arg_evaluator is None:
+        if arg_memo is None:
+            return run_full_test_encoded(arg_amino_codes, arg_structure_codes, get_tables(), True)
+        key = tuple(arg_weight_list)
+        if key in arg_memo:
+            count_event("optimizer_memo_hits")
+        else:
+            arg_memo[key] = run_full_test_encoded(arg_amino_codes, arg_structure_codes, get_tables(), True)
+        return arg_memo[key]
+    if arg_index is None:
+        return arg_evaluator.score()
+    return arg_evaluator.set_weight(arg_index, arg_weight_list[arg_index])
+
+
+# the limits on how long the optimization algorithm runs, as a wall-clock time in seconds and a number of trials, either of which can be left out
+class OptimizationBudget:
+
+    def __init__(self, arg_max_seconds=None, arg_max_trials=None):
+
+        self.deadline = None
+        if arg_max_seconds is not None:
+            self.deadline = time.time() + arg_max_seconds
+        self.max_trials = arg_max_trials
+        self.trials = 0
+
+    # counts a single trial
+    def spend(self):
+
+        self.trials += 1
+
+    # determines if the time or the number of trials has run out
+    def exhausted(self):
+
+        if self.deadline is not None and time.time() >= self.deadline:
+            return True
+        return self.max_trials is not None and self.trials >= self.max_trials
+
+
+# writes the state of the optimization algorithm to a file as JSON
+# the file is written under a temporary name and then renamed, so an interrupted write never leaves a partly written checkpoint
+def write_checkpoint(arg_filename, arg_state):
+
+    temporary_filename = arg_filename + "." + str(getpid()) + ".tmp"
+    with open(temporary_filename, "w") as f:
+        json.dump(arg_state, f, indent=2)
+    replace(temporary_filename, arg_filename)
+
+
+# reads the state of the optimization algorithm from a file written by write_checkpoint
+def read_checkpoint(arg_filename):
+
+    with open(arg_filename, "r") as f:
+        return json.load(f)
+
+
+# runs the optimization algorithm for the weights for the coefficients
+# with a checkpoint filename, the step size, weight and direction being optimized, the weights and the best score are saved to that file
+# at the start of a weight, when the given number of seconds has passed since the last time, and when the optimization stops
+# with resuming enabled, the optimization continues from the checkpoint in that file, if there is one, giving the same result as if it had not stopped
+# with a budget, the optimization stops cleanly when the time or the number of trials runs out, returning the best weights found so far
+# returns the best score, number of tries, and the optimal weights
+@instrumented("optimization")
+def run_optimization(filename, enable_console=True, enable_incremental=False, enable_binary_corpus=False, enable_line_search=False,
+                     arg_checkpoint_filename=None, arg_checkpoint_interval=60, enable_resume=False, arg_budget=None, enable_progress=False):
+
+    file_amino_codes, file_structure_codes = read_file_encoded(filename, "Input path + name + extension of the input text file for training, or press enter without input to use the default name (\"train.txt\"): ", enable_console, enable_binary_corpus)
+
+    weight_list = [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1]
+
+    if enable_line_search:
+        best_score, tries = run_line_search(file_amino_codes, file_structure_codes, weight_list, arg_budget=arg_budget)
+        return best_score, tries, weight_list[:]
+
+    # the optimization starts at the smallest step level (1 for 0.1, 2 for 0.01 and 3 for 0.001), the first weight, and stepping up (1) before down (-1)
+    start_level, start_index, start_direction = 1, 0, 1
+    if enable_resume and arg_checkpoint_filename and path.exists(arg_checkpoint_filename):
+        checkpoint = read_checkpoint(arg_checkpoint_filename)
+        if checkpoint["training_file"] != filename:
+            raise ValueError("The checkpoint " + arg_checkpoint_filename + " was saved while training on " + checkpoint["training_file"] + ", not " + filename)
+        weight_list = checkpoint["weights"]
+        start_level, start_index, start_direction = checkpoint["step_level"], checkpoint["index"], checkpoint["direction"]
+
+    current_score = 0
+    best_score = 0
+    evaluator = None
+    memo = {}
+    stopped = False
+    last_checkpoint = None
+
+    if enable_incremental:
+        evaluator = IncrementalEvaluator(file_amino_codes, file_structure_codes, weight_list)
+
+    for i in range (start_level, 4):
+        step = 10**(-i)
+
+        for j in range (start_index if i == start_level else 0, len(weight_list)):
+
+            direction = start_direction if (i, j) == (start_level, start_index) else 1
+            best_score, tries = score_weights(file_amino_codes, file_structure_codes, weight_list, None, evaluator, memo)
+
+            if last_checkpoint is None or time.time() - last_checkpoint >= arg_checkpoint_interval:
+                last_checkpoint = time.time()
+                if arg_checkpoint_filename:
+                    write_checkpoint(arg_checkpoint_filename, {"training_file" : filename, "step_level" : i, "index" : j, "direction" : direction, "weights" : weight_list, "best_score" : best_score, "tries" : tries})
+                if enable_progress:
+                    print("Step " + str(step) + ", weight " + str(j + 1) + " of " + str(len(weight_list)) + ": best score " + str(best_score) + " of " + str(tries) + " (" + str(round(best_score*100/tries, 2)) + "%)")
+
+            current_score = best_score + 1
+            while direction == 1 and current_score > best_score:
+                if arg_budget is not None and arg_budget.exhausted():
+                    stopped = True
+                    break
+                weight_list[j] += step
+                current_score, tries = score_weights(file_amino_codes, file_structure_codes, weight_list, j, evaluator, memo)
+                count_event("optimizer_trials")
+                if arg_budget is not None:
+                    arg_budget.spend()
+                if current_score > best_score:
+                    best_score = current_score
+                    count_event("optimizer_accepted_steps")
+                else:
+                    weight_list[j] -= step
+                    score_weights(file_amino_codes, file_structure_codes, weight_list, j, evaluator, memo)
+
+            if not stopped:
+                direction = -1
+            current_score = best_score + 1
+            while not stopped and current_score > best_score:
+                if arg_budget is not None and arg_budget.exhausted():
+                    stopped = True
+                    break
+                weight_list[j] -= step
+                current_score, tries = score_weights(file_amino_codes, file_structure_codes, weight_list, j, evaluator, memo)
+                count_event("optimizer_trials")
+                if arg_budget is not None:
+                    arg_budget.spend()
+                if current_score > best_score:
+                    best_score = current_score
+                    count_event("optimizer_accepted_steps")
+                else:
+                    weight_list[j] += step
+                    score_weights(file_amino_codes, file_structure_codes, weight_list, j, evaluator, memo)
+
+            # the weights are always back on the best weights found between trials, so they can be saved and returned as they are
+            if stopped:
+                if arg_checkpoint_filename:
+                    write_checkpoint(arg_checkpoint_filename, {"training_file" : filename, "step_level" : i, "index" : j, "direction" : direction, "weights" : weight_list, "best_score" : best_score, "tries" : tries})
+                if enable_progress:
+                    print("Stopped at step " + str(step) + ", weight " + str(j + 1) + " of " + str(len(weight_list)) + ", as the optimization budget ran out")
+                break
+        if stopped:
+            break
+
+    # the weights are scored here as well, since resuming a finished optimization skips the loop above
+    best_score, tries = score_weights(file_amino_codes, file_structure_codes, weight_list, None, evaluator, memo)
+
+    # a finished optimization is saved as being past the last step level, so resuming it does not optimize any further
+    if not stopped and arg_checkpoint_filename:
+        write_checkpoint(arg_checkpoint_filename, {"training_file" : filename, "step_level" : 4, "index" : 0, "direction" : 1, "weights" : weight_list, "best_score" : best_score, "tries" : tries})
+
+    return best_score, tries, weight_list[:]
+
+
+# optimizes the weights one at a time, moving each weight straight to the best interval between its breakpoints within the given distance of its current value
+# the weights are gone through again until none of them can be improved, and the weights in the list are changed to the optimized weights
+# returns the best score and number of tries
+# with a budget, the optimization stops cleanly when the time or the number of trials runs out
+def run_line_search(arg_amino_codes, arg_structure_codes, arg_weight_list, arg_radius=1.0, arg_budget=None):
+
+    evaluator = IncrementalEvaluator(arg_amino_codes, arg_structure_codes, arg_weight_list)
+    best_score, tries = score_weights(arg_amino_codes, arg_structure_codes, arg_weight_list, None, evaluator)
+
+    improved = True
+    while improved:
+        improved = False
+
+        for j in range (len(arg_weight_list)):
+
+            if arg_budget is not None and arg_budget.exhausted():
+                return best_score, tries
+
+            previous_weight = arg_weight_list[j]
+            weight, score = evaluator.line_search(j, previous_weight - arg_radius, previous_weight + arg_radius)
+            count_event("optimizer_line_searches")
+            if score <= best_score:
+                continue
+
+            # the score of the new weight is found again with the exact sums, and the weight is only kept if it is really better
+            arg_weight_list[j] = weight
+            current_score, tries = score_weights(arg_amino_codes, arg_structure_codes, arg_weight_list, j, evaluator)
+            count_event("optimizer_trials")
+            if arg_budget is not None:
+                arg_budget.spend()
+            if current_score > best_score:
+                best_score = current_score
+                improved = True
+                count_event("optimizer_accepted_steps")
+            else:
+                arg_weight_list[j] = previous_weight
+                score_weights(arg_amino_codes, arg_structure_codes, arg_weight_list, j, evaluator)
+
+    return best_score, tries
+
+
+# stochastic optimization
+# region
+
+# for training data too large to score every trial against, each weight is optimized against a random batch of sequences instead
+# the sequences are read from the binary corpus of the training file when they are needed, so only the sequences being scored are held in memory
+# the batches grow as the steps get smaller, since smaller steps change the score less and need more sequences to tell apart
+# a new weight is only kept if it also improves the score on the whole training data, or on a held out set of sequences never used in the batches
+
+
+# scores a list of weights against some of the sequences in a binary corpus, reading and scoring a chunk of sequences at a time
+# returns the score and number of tries
+def score_corpus(arg_corpus, arg_indices, arg_tables, arg_chunk_size=256):
+
+    total_score = 0
+    total_tries = 0
+
+    for start in range (0, len(arg_indices), arg_chunk_size):
+        amino_codes = []
+        structure_codes = []
+        for i in arg_indices[start:start + arg_chunk_size]:
+            amino, structure = arg_corpus.sequence(i)
+            amino_codes.append(amino)
+            structure_codes.append(structure)
+        score, tries = run_full_test_encoded(amino_codes, structure_codes, arg_tables, True)
+        total_score += score
+        total_tries += tries
+
+    return total_score, total_tries
+
+
+# runs the optimization algorithm against random batches of sequences, in the same order of step sizes and weights as run_optimization
+# each weight gets a new batch, drawn from the given seed, of the given number of sequences for the largest step, and four times as many for each smaller step
+# with a holdout size, that many sequences are held out of the batches, and new weights are confirmed on them instead of on the whole training data
+# without one, every confirmation scores the whole training data, so the time taken still grows with the size of the training data
+# raises a ValueError if the training data holds no sequences, if a holdout is asked for with fewer than two sequences, or if there are no amino acids to confirm weights on
+# returns the best score and number of tries on the sequences the weights are confirmed on, and the optimal weights
+@instrumented("optimization")
+def run_optimization_stochastic(filename, arg_batch_size=32, arg_holdout_size=None, arg_seed=0, arg_budget=None, enable_progress=False):
+
+    rng = random.Random(arg_seed)
+
+    with open_corpus(filename) as corpus:
+
+        indices = list(range (len(corpus)))
+        if not indices:
+            raise ValueError("The training file " + filename + " holds no sequences")
+        if arg_holdout_size and len(indices) < 2:
+            raise ValueError("A holdout needs at least two sequences, one to hold out and one to draw batches from, but " + filename + " holds only one")
+        if arg_holdout_size:
+            confirm_indices = sorted(rng.sample(indices, min(arg_holdout_size, len(indices) - 1)))
+            held_out = set(confirm_indices)
+            indices = [i for i in indices if i not in held_out]
+        else:
+            confirm_indices = indices
+
+        weight_list = [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1]
+        confirmed_score, tries = score_corpus(corpus, confirm_indices, create_tables(weight_list))
+        if tries == 0:
+            raise ValueError("The sequences of " + filename + " that new weights are confirmed on hold no amino acids")
+        stopped = False
+
+        for i in range (1, 4):
+            step = 10**(-i)
+            batch_size = min(arg_batch_size*4**(i - 1), len(indices))
+
+            for j in range (len(weight_list)):
+
+                batch = sorted(rng.sample(indices, batch_size))
+                amino_codes = []
+                structure_codes = []
+                for k in batch:
+                    amino, structure = corpus.sequence(k)
+                    amino_codes.append(amino)
+                    structure_codes.append(structure)
+
+                previous_weight = weight_list[j]
+                accepted = False
+                best_score, batch_tries = run_full_test_encoded(amino_codes, structure_codes, create_tables(weight_list), True)
+
+                for direction in (step, -step):
+                    current_score = best_score + 1
+                    while current_score > best_score:
+                        if arg_budget is not None and arg_budget.exhausted():
+                            stopped = True
+                            break
+                        weight_list[j] += direction
+                        current_score, batch_tries = run_full_test_encoded(amino_codes, structure_codes, create_tables(weight_list), True)
+                        count_event("optimizer_trials")
+                        if arg_budget is not None:
+                            arg_budget.spend()
+                        if current_score > best_score:
+                            best_score = current_score
+                            accepted = True
+                            count_event("optimizer_accepted_steps")
+                        else:
+                            weight_list[j] -= direction
+                    if stopped:
+                        break
+
+                # the new weight is only kept if the score on the whole training data, or the held out sequences, is better as well
+                if accepted:
+                    score, tries = score_corpus(corpus, confirm_indices, create_tables(weight_list))
+                    count_event("optimizer_confirmations")
+                    if score > confirmed_score:
+                        confirmed_score = score
+                    else:
+                        accepted = False
+                        count_event("optimizer_rejected_steps")
+                if not accepted:
+                    weight_list[j] = previous_weight
+
+                if enable_progress:
+                    print("Step " + str(step) + ", weight " + str(j + 1) + " of " + str(len(weight_list)) + ", batch of " + str(batch_size) + ": confirmed score " + str(confirmed_score) + " of " + str(tries) + " (" + str(round(confirmed_score*100/tries, 2)) + "%)")
+
+                if stopped:
+                    break
+            if stopped:
+                break
+
+    return confirmed_score, tries, weight_list[:]
+
+# endregion
+
+
+# parallel optimization
+# region
+
+# the parsed and encoded training data of a worker process, loaded once when the worker starts
+worker_amino_codes = None
+worker_structure_codes = None
+
+
+# loads the training data in a worker process for the parallel optimization algorithm
+def init_optimization_worker(arg_filename, enable_binary_corpus=False):
+
+    global worker_amino_codes
+    global worker_structure_codes
+
+    worker_amino_codes, worker_structure_codes = read_file_encoded(arg_filename, "", False, enable_binary_corpus)
+
+
+# scores a single candidate list of weights in a worker process
+# returns the score and number of tries
+def score_candidate(arg_weight_list):
+
+    return score_weights(worker_amino_codes, worker_structure_codes, arg_weight_list)
+
+
+# runs the optimization algorithm, scoring candidate weights in parallel in a pool of worker processes
+# each round tries both step directions for a block of coordinates at once, and takes the candidate with the best improvement
+# the coordinates are visited in an order given by the seed, so the result is the same for the same seed and number of workers
+# with a budget, the optimization stops before the first block of candidates once the budget is exhausted, and each candidate counts as a trial
+# returns the best score, number of tries, and the optimal weights
+@instrumented("optimization")
+def run_optimization_parallel(filename, enable_console=True, arg_workers=None, arg_seed=0, enable_binary_corpus=False, arg_budget=None):
+
+    if enable_console:
+        console_filename = input("Input path + name + extension of the input text file for training, or press enter without input to use the default name (\"train.txt\"): ")
+        if console_filename:
+            filename = console_filename
+
+    workers = arg_workers or cpu_count() or 1
+    block_size = max(1, workers // 2)
+    rng = random.Random(arg_seed)
+
+    weight_list = [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1]
+
+    # the binary corpus is brought up to date before the workers start, so they all map the same file
+    if enable_binary_corpus:
+        open_corpus(filename).close()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_optimization_worker, initargs=(filename, enable_binary_corpus)) as pool:
+
+        best_score, tries = pool.submit(score_candidate, weight_list).result()
+        stopped = False
+
+        for i in range (1, 4):
+            step = 10**(-i)
+
+            improved = True
+            while improved and not stopped:
+                improved = False
+                coordinates = list(range(len(weight_list)))
+                rng.shuffle(coordinates)
+
+                for k in range (0, len(coordinates), block_size):
+
+                    if arg_budget is not None and arg_budget.exhausted():
+                        stopped = True
+                        break
+
+                    candidates = []
+                    for j in coordinates[k:k+block_size]:
+                        for direction in (step, -step):
+                            candidate = weight_list[:]
+                            candidate[j] += direction
+                            candidates.append(candidate)
+
+                    # the results come back in the same order as the candidates, so ties always go to the first candidate
+                    best_candidate = None
+                    for candidate, (candidate_score, candidate_tries) in zip(candidates, pool.map(score_candidate, candidates)):
+                        if candidate_score > best_score:
+                            best_score = candidate_score
+                            best_candidate = candidate
+
+                    count_event("optimizer_trials", len(candidates))
+                    if arg_budget is not None:
+                        for candidate in candidates:
+                            arg_budget.spend()
+                    if best_candidate is not None:
+                        weight_list = best_candidate
+                        improved = True
+                        count_event("optimizer_accepted_steps")
+
+            if stopped:
+                break
+
+    # leaves the dictionaries set to the optimal weights, the same as run_optimization
+    score_weights([], [], weight_list)
+
+    return best_score, tries, weight_list[:]
+
+# endregion
+
+
+# parallel prediction
+# region
+
+# whether a worker process uses the vectorized engine, set once when the worker starts
+worker_vectorized = False
+
+
+# loads the weights in a worker process for the parallel prediction
+def init_prediction_worker(arg_weights_filename, enable_vectorized=False):
+
+    global helix_formers
+    global helix_high_indiff
+    global helix_breakers
+    global helix_indiff
+    global sheet_formers
+    global sheet_breakers
+    global sheet_indiff
+    global worker_vectorized
+
+    helix_formers, helix_high_indiff, helix_breakers, helix_indiff, sheet_formers, sheet_breakers, sheet_indiff = create_dicts_file(arg_weights_filename, False)
+    worker_vectorized = enable_vectorized
+
+
+# predicts the structures of a chunk of sequences in a worker process
+# returns the predicted structures
+def predict_chunk(arg_amino_strings):
+
+    return run_prediction(arg_amino_strings, worker_vectorized)
+
+
+# groups sequences into chunks of about the given number of amino acids
+# a sequence that would make a chunk too large starts a new chunk, so a very long sequence ends up in a chunk of its own
+# yields lists of amino strings
+def chunk_sequences(arg_amino_strings, arg_chunk_size):
+
+    chunk = []
+    chunk_length = 0
+
+    for amino_string in arg_amino_strings:
+        if chunk and chunk_length + len(amino_string) > arg_chunk_size:
+            yield chunk
+            chunk = []
+            chunk_length = 0
+        chunk.append(amino_string)
+        chunk_length += len(amino_string)
+
+    if chunk:
+        yield chunk
+
+
+# runs structure predictions on sequences in a pool of worker processes, the same way as predict_records
+# only a limited number of chunks are in progress at once, and the results are yielded in the same order as the sequences are given
+# with a prediction cache, only the sequences that are not cached are sent to the workers
+def predict_records_parallel(arg_records, arg_weights_filename, arg_workers=None, enable_vectorized=False, arg_chunk_size=20000, arg_cache=None):
+
+    workers = arg_workers or cpu_count() or 1
+    pending = deque()
+    fingerprint = None
+
+    if arg_cache is not None:
+        fingerprint = weights_fingerprint()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_prediction_worker, initargs=(arg_weights_filename, enable_vectorized)) as pool:
+
+        for chunk in chunk_sequences((amino_string for amino_string, structure_string in arg_records), arg_chunk_size):
+
+            cached_structures = [None]*len(chunk)
+            if arg_cache is not None:
+                cached_structures = [arg_cache.get(amino_string, fingerprint) for amino_string in chunk]
+            missing = [chunk[k] for k in range (len(chunk)) if cached_structures[k] is None]
+            pending.append((chunk, cached_structures, pool.submit(predict_chunk, missing)))
+
+            # waits for the oldest chunk before reading more, so the memory used stays bounded
+            while len(pending) > 2*workers:
+                yield from finish_chunk(pending.popleft(), arg_cache, fingerprint)
+
+        while pending:
+            yield from finish_chunk(pending.popleft(), arg_cache, fingerprint)
+
+
+# combines the cached and newly predicted structures of a chunk from predict_records_parallel, caching the new ones
+# yields the amino acids and the predicted structures of each sequence in the chunk
+def finish_chunk(arg_pending_chunk, arg_cache, arg_fingerprint):
+
+    chunk, cached_structures, future = arg_pending_chunk
+    new_structures = iter(future.result())
+
+    for k in range (len(chunk)):
+        predicted_structure = cached_structures[k]
+        if predicted_structure is None:
+            predicted_structure = next(new_structures)
+            if arg_cache is not None:
+                arg_cache.put(chunk[k], arg_fingerprint, predicted_structure)
+        yield chunk[k], predicted_structure
+
+# endregion
+
+
+# mutation scanning
+# region
+
+# the effect of every point mutation of a sequence is found from the prediction for the unmutated (wild type) sequence
+# a mutation only changes the sums of the windows containing it, and the continue/terminate decisions of the contexts containing it
+# so only those windows are decided again, and the prediction is only redone until it matches the wild type prediction again
+
+# the amino acids each position is mutated to
+mutation_residues = "ACDEFGHIKLMNPQRSTVWY"
+
+
+# the window offsets of the helix former, helix breaker, sheet former and sheet breaker sums, in the same order as the tables
+table_window_offsets = (helix_window_offsets, helix_window_offsets, sheet_window_offsets, sheet_window_offsets)
+
+
+# returns the sum of a lookup table over the window deciding index i of the predicted structure, adding the offsets in the same order as predict_codes
+def window_table_sum(arg_codes, arg_table, arg_offsets, i):
+
+    window_sum = 0
+    for offset in arg_offsets:
+        window_sum += arg_table[arg_codes[i+6+offset]]
+    return window_sum
+
+
+# returns the continue/terminate flags of the context deciding index i of the predicted structure
+def window_context_flags(arg_codes, arg_context_table, i):
+
+    char_codes, code_map, size, flags = arg_context_table
+    return flags[(code_map[arg_codes[i+6]]*size + code_map[arg_codes[i+7]])*size + code_map[arg_codes[i+8]]]
+
+
+# returns the next state code from the code of the structure started by the window, the continue/terminate flags, and the previous state code
+def next_state_code(arg_init_code, arg_flags, arg_state):
+
+    if arg_init_code == 1 or (arg_state == 1 and arg_flags & cont_helix_flag):
+        return 1
+    elif arg_init_code == 2 or (arg_state == 2 and arg_flags & cont_sheet_flag):
+        return 2
+    return 0
+
+
+# predicts the effect of every point mutation of a sequence of amino acids, without the "Z" padding, one mutation at a time
+# each position is mutated to each of the given amino acids, except its own, which would change nothing
+# yields the position (counting from 1), the wild type and mutant amino acids, the number of predicted structures that change,
+# and the fraction of the predicted structures of the mutated sequence that are helix and sheet
+@instrumented_records("scan_mutations")
+def scan_mutations(arg_sequence, arg_tables, arg_residues=mutation_residues):
+
+    codes = bytearray(encode_sequence("Z"*6 + arg_sequence + "Z"*6))
+    n = len(codes) - 12
+    context_table = arg_tables[4]
+    code_map = context_table[1]
+
+    sums = [[window_table_sum(codes, arg_tables[t], table_window_offsets[t], i) for i in range (n)] for t in range (4)]
+    init_codes = [init_code(sums[0][i], sums[1][i], sums[2][i], sums[3][i]) for i in range (n)]
+    context_flags = [window_context_flags(codes, context_table, i) for i in range (n)]
+    states = []
+    state = 0
+    for i in range (n):
+        state = next_state_code(init_codes[i], context_flags[i], state)
+        states.append(state)
+    wild_type_helix = states.count(1)
+    wild_type_sheet = states.count(2)
+
+    mutant_codes = encode_sequence(arg_residues)
+
+    for r in range (n):
+        wild_type = codes[r+6]
+
+        for k in range (len(arg_residues)):
+            mutant = mutant_codes[k]
+            if mutant == wild_type:
+                continue
+
+            # only the sums of the tables where the mutant has a different value than the wild type change, in the windows containing position r
+            mutant_init_codes = {}
+            codes[r+6] = mutant
+            for t in range (4):
+                if arg_tables[t][mutant] == arg_tables[t][wild_type]:
+                    continue
+                for offset in table_window_offsets[t]:
+                    i = r - offset
+                    if 0 <= i < n:
+                        if i not in mutant_init_codes:
+                            mutant_init_codes[i] = [sums[0][i], sums[1][i], sums[2][i], sums[3][i]]
+                        mutant_init_codes[i][t] = window_table_sum(codes, arg_tables[t], table_window_offsets[t], i)
+            for i in mutant_init_codes:
+                mutant_init_codes[i] = init_code(*mutant_init_codes[i])
+
+            # the contexts containing position r decide indexes r - 2 to r, and only change if the mutant is in a different breaker/indifferent set
+            mutant_context_flags = {}
+            if code_map[mutant] != code_map[wild_type]:
+                for i in range (max(r - 2, 0), r + 1):
+                    mutant_context_flags[i] = window_context_flags(codes, context_table, i)
+            codes[r+6] = wild_type
+
+            changed = 0
+            helix = wild_type_helix
+            sheet = wild_type_sheet
+            changed_indexes = list(mutant_init_codes) + list(mutant_context_flags)
+            if changed_indexes:
+                first = min(changed_indexes)
+                last = max(changed_indexes)
+                if first > 0:
+                    state = states[first-1]
+                else:
+                    state = 0
+                i = first
+                while i < n:
+                    state = next_state_code(mutant_init_codes.get(i, init_codes[i]), mutant_context_flags.get(i, context_flags[i]), state)
+                    if state != states[i]:
+                        changed += 1
+                        helix += (state == 1) - (states[i] == 1)
+                        sheet += (state == 2) - (states[i] == 2)
+                    elif i >= last:
+                        break
+                    i += 1
+
+            yield r + 1, arg_sequence[r], arg_residues[k], changed, helix / n, sheet / n
+
+
+# returns a single row of a mutation scan, holding the name of the sequence, the position and the wild type amino acid,
+# followed by the number of predicted structures that change, the fraction of helix and the fraction of sheet for each mutant amino acid
+# the mutations are given as a dictionary of the number of changes and fractions by mutant amino acid, and mutations that are not given (such as to the wild type) are written as "-"
+def format_mutation_row(arg_name, arg_position, arg_wild_type, arg_mutations, arg_residues=mutation_residues):
+
+    changed = []
+    helix = []
+    sheet = []
+    for mutant in arg_residues:
+        if mutant in arg_mutations:
+            changed_count, helix_fraction, sheet_fraction = arg_mutations[mutant]
+            changed.append(str(changed_count))
+            helix.append(str(round(helix_fraction, 4)))
+            sheet.append(str(round(sheet_fraction, 4)))
+        else:
+            changed.append("-")
+            helix.append("-")
+            sheet.append("-")
+
+    return "\t".join([arg_name, str(arg_position), arg_wild_type] + changed + helix + sheet) + "\n"
+
+
+# writes the mutation scans of a number of sequences to a file as a tab separated table, one sequence at a time as they are scanned
+# the input is an iterable of amino strings, padded the same way as by read_records, and their structures, and optionally an iterable of names of the sequences, in the same order
+# the names are used the same way as by write_structures_compact
+# without names, or once the names run out, each sequence is named by its number, counting from 1
+# each row holds a single position of a sequence, as given by format_mutation_row, so the table has a column of changes, helix fractions and sheet fractions for each mutant amino acid
+def write_mutation_scan(arg_filename, arg_records, arg_tables, arg_names=None, enable_console=True):
+
+    filename = arg_filename
+
+    if arg_names is not None and not isinstance(arg_names, deque):
+        arg_names = deque(arg_names)
+
+    if enable_console:
+        console_filename = input("Input path + name + extension of the target text file for saving the mutation scan, or press enter without input to use the default name (\"mutation_scan.txt\"): ")
+        if console_filename:
+            filename = console_filename
+
+    with open_text(filename, "w") as f:
+
+        f.write("\t".join(["sequence", "position", "wild_type"] + list(mutation_residues) + ["helix_" + mutant for mutant in mutation_residues] + ["sheet_" + mutant for mutant in mutation_residues]) + "\n")
+        number = 0
+        for amino, structure in arg_records:
+            number += 1
+            if arg_names:
+                name = arg_names.popleft()
+            else:
+                name = str(number)
+            lines = []
+            sequence = amino[6:-6]
+            mutations = [{} for r in range (len(sequence))]
+            for position, wild_type, mutant, changed, helix_fraction, sheet_fraction in scan_mutations(sequence, arg_tables):
+                mutations[position - 1][mutant] = changed, helix_fraction, sheet_fraction
+            for r in range (len(sequence)):
+                lines.append(format_mutation_row(name, r + 1, sequence[r], mutations[r]))
+            f.write("".join(lines))
+
+    return filename
+
+# endregion
+
+
+# predictor
+# region
+
+# a predictor holds its own weights and lookup tables, and does not use or change the dictionaries held by the module
+# it cannot be changed after it is created, so a single predictor can be shared between threads, and kept for as long as it is needed
+
+
+# predicts and scores structures with a fixed list of weights
+# the sequences given to a predictor are plain strings of amino acids and structures, without the "Z" padding used by read_file
+# the amino acids can be given in upper or lower case
+class Predictor:
+
+    __slots__ = ("weight_list", "tables", "vector_tables")
+
+    def __init__(self, arg_weight_list=None):
+
+        if arg_weight_list is None:
+            arg_weight_list = [1]*len(weight_targets)
+        if len(arg_weight_list) != len(weight_targets):
+            raise ValueError("Expected " + str(len(weight_targets)) + " weights, got " + str(len(arg_weight_list)))
+
+        weight_list = tuple(float(weight) for weight in arg_weight_list)
+        h_form, h_break, s_form, s_break, context_table = create_tables(weight_list)
+        tables = (tuple(h_form), tuple(h_break), tuple(s_form), tuple(s_break), context_table)
+
+        vector_tables = None
+        if np is not None:
+            vector_tables = create_vector_tables(tables)
+            for table in vector_tables:
+                if isinstance(table, np.ndarray) and table.flags.owndata:
+                    table.flags.writeable = False
+
+        object.__setattr__(self, "weight_list", weight_list)
+        object.__setattr__(self, "tables", tables)
+        object.__setattr__(self, "vector_tables", vector_tables)
+
+    def __setattr__(self, arg_name, arg_value):
+
+        raise AttributeError("Predictor objects cannot be changed")
+
+    def __repr__(self):
+
+        return "Predictor(" + repr(list(self.weight_list)) + ")"
+
+    # returns a predictor with the weights from a file, such as one saved by write_weights
+    @classmethod
+    def from_file(cls, arg_filename="weights.txt"):
+
+        return cls(read_weights(arg_filename))
+
+    # returns the predicted state codes of a single sequence of amino acids
+    def predict_states(self, arg_sequence):
+
+        codes = encode_sequence("Z"*6 + arg_sequence.upper() + "Z"*6)
+        if self.vector_tables is not None:
+            return predict_codes_vectorized(codes, self.vector_tables)
+        return predict_codes(codes, self.tables)
+
+    # returns the predicted structures of a single sequence of amino acids, as a string of "h", "e" and "_"
+    def predict(self, arg_sequence):
+
+        return self.predict_states(arg_sequence).translate(state_symbols).decode()
+
+    # returns the predicted structures of each of a list of sequences
+    def predict_many(self, arg_sequences):
+
+        return [self.predict(sequence) for sequence in arg_sequences]
+
+    # compares the predicted structures of a list of sequences to their known structures
+    # returns the score and number of tries, the same as run_full_test
+    def score(self, arg_sequences, arg_structures):
+
+        total_score = 0
+        total_tries = 0
+
+        for i in range (len(arg_sequences)):
+            states = self.predict_states(arg_sequences[i])
+            total_score += count_hits(states, b"\xff"*6 + encode_structure(arg_structures[i]))
+            total_tries += len(states)
+
+        return total_score, total_tries
+
+    # predicts the effect of every point mutation of a single sequence of amino acids, as given by scan_mutations
+    def scan_mutations(self, arg_sequence, arg_residues=mutation_residues):
+
+        return scan_mutations(arg_sequence.upper(), self.tables, arg_residues)
+
+# endregion
+
+
+# checks that the options given for optimizing are all used by the optimization algorithm they choose, instead of some of them being ignored
+# the stochastic algorithm is chosen over the others, then the parallel algorithm with more than one worker, then the line search
+# checkpoints and resuming are only used by the serial fixed step algorithm, incremental evaluation by the serial algorithms, and a holdout by the stochastic algorithm
+# raises a ValueError naming the first option that would be ignored
+def check_opt_options(enable_incremental=False, arg_workers=1, enable_line_search=False, arg_checkpoint_filename=None, enable_resume=False,
+                      enable_stochastic=False, arg_holdout_size=None):
+
+    if enable_stochastic:
+        algorithm = "stochastic optimization"
+    elif arg_workers != 1:
+        algorithm = "more than one worker"
+    elif enable_line_search:
+        algorithm = "the line search"
+    else:
+        algorithm = None
+
+    if algorithm is not None and (arg_checkpoint_filename is not None or enable_resume):
+        raise ValueError("Checkpoints and resuming are not used with " + algorithm)
+    if enable_stochastic and (enable_incremental or enable_line_search or arg_workers != 1):
+        raise ValueError("Incremental evaluation, the line search and more than one worker are not used with stochastic optimization")
+    if arg_workers != 1 and (enable_incremental or enable_line_search):
+        raise ValueError("Incremental evaluation and the line search are not used with more than one worker")
+    if arg_holdout_size is not None and not enable_stochastic:
+        raise ValueError("A holdout is only used with stochastic optimization")
+
+
+# runs the optimization algorithm for the weights for the coefficients, saving the coefficients to a file
+# with a time limit in seconds or a limit on the number of trials, the best weights found when the limit is reached are saved
+# checkpoints and resuming are only used by the serial fixed step optimization algorithm, and limits by every optimization algorithm
+# options that the chosen optimization algorithm does not use raise a ValueError, as given by check_opt_options
+# with stochastic optimization, the weights are optimized against random batches of arg_batch_size sequences, and confirmed on arg_holdout_size held out sequences, or all of them
+# returns the best score, number of tries, and the optimal weights
+def main_opt(arg_filename="train.txt", enable_console=True, enable_incremental=False, arg_workers=1, arg_seed=0, enable_binary_corpus=False, enable_line_search=False,
+             arg_checkpoint_filename=None, arg_checkpoint_interval=60, enable_resume=False, arg_max_seconds=None, arg_max_trials=None,
+             enable_stochastic=False, arg_batch_size=32, arg_holdout_size=None):
+
+    global helix_formers
+    global helix_high_indiff
+    global helix_breakers
+    global helix_indiff
+    global sheet_formers
+    global sheet_breakers
+    global sheet_indiff
+
+    check_opt_options(enable_incremental, arg_workers, enable_line_search, arg_checkpoint_filename, enable_resume, enable_stochastic, arg_holdout_size)
+
+    print()
+
+    filename = arg_filename
+
+    if enable_console:
+        console_filename = input("Input path + name + extension of the input text file for training, or press enter without input to use the default name (\"train.txt\"): ")
+        if console_filename:
+            filename = console_filename
+
+    print()
+    print("Optimizing...")
+    print()
+    budget = None
+    if arg_max_seconds is not None or arg_max_trials is not None:
+        budget = OptimizationBudget(arg_max_seconds, arg_max_trials)
+
+    if enable_stochastic:
+        opt_best_score, opt_tries, weight_list = run_optimization_stochastic(filename, arg_batch_size, arg_holdout_size, arg_seed, budget, True)
+    elif arg_workers == 1:
+        opt_best_score, opt_tries, weight_list = run_optimization(filename, False, enable_incremental, enable_binary_corpus, enable_line_search,
+                                                                  arg_checkpoint_filename, arg_checkpoint_interval, enable_resume, budget, True)
+    else:
+        opt_best_score, opt_tries, weight_list = run_optimization_parallel(filename, False, arg_workers, arg_seed, enable_binary_corpus, budget)
+    filename_weights = write_weights("weights.txt", weight_list)
+    print()
+    print("Best optimized score: ",  str(opt_best_score).rjust(8))
+    print("Number of amino acids:",  str(opt_tries).rjust(8))
+    print("Success rate:         ", (str(round(opt_best_score*100/opt_tries, 2)) + "%").rjust(8))
+    print()
+    print("Optimized weights successfully written to " + filename_weights)
+
+    return opt_best_score, opt_tries, weight_list
+
+
+# runs the algorithm against a known sequence + structure, writing the success rate to console
+# returns the score and the number of tries
+def main_test(arg_filename="test.txt", enable_console=True, enable_vectorized=False, enable_binary_corpus=False):
+
+    global helix_formers
     global helix_high_indiff
     global helix_breakers
     global helix_indiff
@@ -448,40 +2862,138 @@ def main_run(arg_filename="data.txt", enable_console=True):
 
     helix_formers, helix_high_indiff, helix_breakers, helix_indiff, sheet_formers, sheet_breakers, sheet_indiff = create_dicts_file("weights.txt")
 
-    file_amino_strings, file_structure_strings = read_file(arg_filename, "Input path + name + extension of the input text file for predicting structures, or press enter without input to use the default name (\"data.txt\"): ", enable_console)
-    
-    predicted_structures = run_prediction(file_amino_strings)
+    if enable_binary_corpus:
+        file_amino_codes, file_structure_codes = read_file_encoded(arg_filename, "Input path + name + extension of the input text file for testing, or press enter without input to use the default name (\"test.txt\"): ", enable_console, True)
+        total_score, total_tries = run_full_test_encoded(file_amino_codes, file_structure_codes, get_tables(), enable_vectorized)
+    else:
+        file_amino_strings, file_structure_strings = read_file(arg_filename, "Input path + name + extension of the input text file for testing, or press enter without input to use the default name (\"test.txt\"): ", enable_console)
+        total_score, total_tries = run_full_test(file_amino_strings, file_structure_strings, enable_vectorized)
+
+    print()
+    print("Final score in test run:",  str(total_score).rjust(8))
+    print("Number of amino acids:  ",  str(total_tries).rjust(8))
+    print("Success rate:           ", (str(round(total_score*100/total_tries, 2)) + "%").rjust(8))
+
+    return total_score, total_tries
+
+
+# runs the algorithm against a sequence with unknown structure, writing the predicted structures to a file
+# does not return anything
+def main_run(arg_filename="data.txt", enable_console=True, enable_vectorized=False, arg_workers=1, enable_cache=False, arg_cache_size=10000, arg_cache_filename=None, enable_compact_output=False):
+
+    global helix_formers
+    global helix_high_indiff
+    global helix_breakers
+    global helix_indiff
+    global sheet_formers
+    global sheet_breakers
+    global sheet_indiff
+    global prediction_cache
+
+    print()
+
+    helix_formers, helix_high_indiff, helix_breakers, helix_indiff, sheet_formers, sheet_breakers, sheet_indiff = create_dicts_file("weights.txt")
+
+    cache = None
+    if enable_cache:
+        if prediction_cache is None or prediction_cache.filename != arg_cache_filename:
+            prediction_cache = PredictionCache(arg_cache_size, arg_cache_filename)
+        prediction_cache.max_size = arg_cache_size
+        # the cache is kept between runs, but the hits and misses are only counted for this run
+        prediction_cache.reset_counts()
+        cache = prediction_cache
+
+    filename = arg_filename
+
+    if enable_console:
+        console_filename = input("Input path + name + extension of the input text file for predicting structures, or press enter without input to use the default name (\"data.txt\"): ")
+        if console_filename:
+            filename = console_filename
+
+    # the sequences are read, predicted and written one at a time, so only a single sequence is held in memory
+    # with several workers, only the chunks of sequences being predicted are held in memory
+    # the names of the sequences of a FASTA file are only held until their sequences are written
+    names = deque()
+    if arg_workers == 1:
+        predicted_records = predict_records(read_input_records(filename, names), enable_vectorized, cache)
+    else:
+        predicted_records = predict_records_parallel(read_input_records(filename, names), "weights.txt", arg_workers, enable_vectorized, arg_cache=cache)
 
-    filename_structures = write_structures("predicted_structures.txt", file_amino_strings, predicted_structures)
+    if enable_compact_output:
+        filename_structures = write_structures_compact("predicted_structures.tsv", predicted_records, names)
+    else:
+        filename_structures = write_structures_stream("predicted_structures.txt", predicted_records)
 
     print()
     print("Predicted structures successfully written to " + filename_structures)
 
+    if cache is not None:
+        cache.flush()
+        print(cache.summary())
+
+
+# predicts the effect of every point mutation of each sequence in a file, saving the results to a file as a table
+def main_scan(arg_filename="data.txt", enable_console=True):
+
+    global helix_formers
+    global helix_high_indiff
+    global helix_breakers
+    global helix_indiff
+    global sheet_formers
+    global sheet_breakers
+    global sheet_indiff
+
+    print()
+
+    helix_formers, helix_high_indiff, helix_breakers, helix_indiff, sheet_formers, sheet_breakers, sheet_indiff = create_dicts_file("weights.txt")
+
+    filename = arg_filename
+
+    if enable_console:
+        console_filename = input("Input path + name + extension of the input text file for scanning mutations, or press enter without input to use the default name (\"data.txt\"): ")
+        if console_filename:
+            filename = console_filename
+
+    # the sequences are read, scanned and written one at a time, so only a single sequence is held in memory
+    # the names of the sequences of a FASTA file are only held until their sequences are written
+    names = deque()
+    filename_scan = write_mutation_scan("mutation_scan.txt", read_input_records(filename, names), get_tables(), names)
+
+    print()
+    print("Mutation scan successfully written to " + filename_scan)
+
 
 # main program
-# gives the user the choice between optimization, testing, and predicting
-def main():
+# gives the user the choice between optimization, testing, predicting and scanning mutations
+# with instrumentation enabled, a summary of the time spent in each phase is written to console after each choice
+# with a filename for a profile, each choice is profiled with cProfile (and tracemalloc, if enabled), saving the results to that file
+# the options for optimizing, testing and running are given as dictionaries of keyword arguments to main_opt, main_test and main_run
+def main(enable_instrumentation=False, arg_profile_filename=None, enable_tracemalloc=False, arg_opt_options=None, arg_test_options=None, arg_run_options=None):
 
     choice = " "
+    set_instrumentation(enable_instrumentation)
 
     print()
     print("Type \"opt\" to run the optimization algorithm and save the optimized weights to a file.")
     print("Type \"test\" to to test the optimized structure prediction algorithm on an amino sequence with known structures and test its success rate.")
     print("Type \"run\" to run the optimized structure prediction algorithm and save the structures to a file.")
+    print("Type \"scan\" to predict the effect of every point mutation of each sequence in a file and save the results to a file.")
     print("Hit enter without typing to exit the program.")
     print("For more info, read README.md")
 
     while choice:
 
         print()
-        choice = input("Choose functionality (opt/test/run): ").lower()
+        choice = input("Choose functionality (opt/test/run/scan): ").lower()
 
         if choice == "opt":
-            main_opt()
+            run_entry_point(functools.partial(main_opt, **(arg_opt_options or {})), arg_profile_filename, enable_tracemalloc)
         elif choice == "test":
-            main_test()
+            run_entry_point(functools.partial(main_test, **(arg_test_options or {})), arg_profile_filename, enable_tracemalloc)
         elif choice == "run":
-            main_run()
+            run_entry_point(functools.partial(main_run, **(arg_run_options or {})), arg_profile_filename, enable_tracemalloc)
+        elif choice == "scan":
+            run_entry_point(main_scan, arg_profile_filename, enable_tracemalloc)
         elif choice:
             print()
             print("Invalid choice, please try again.")
@@ -494,5 +3006,48 @@ def main():
     return 0
 
 
-main()
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Predicts the secondary structure of proteins based on their amino acid sequences.")
+    parser.add_argument("--instrument", action="store_true", help="write the time spent in each phase to console after each run")
+    parser.add_argument("--profile", metavar="FILENAME", help="profile each run with cProfile, saving the results to the given file")
+    parser.add_argument("--tracemalloc", action="store_true", help="also trace memory use when profiling")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes scoring candidate weights while optimizing, or 0 for the number of CPUs")
+    parser.add_argument("--incremental", action="store_true", help="only recompute the windows changed by each step while optimizing")
+    parser.add_argument("--line-search", action="store_true", help="move each weight straight to the best value between its breakpoints, instead of taking fixed steps")
+    parser.add_argument("--binary-corpus", action="store_true", help="read the training and testing data from a memory-mapped binary corpus of the file")
+    parser.add_argument("--vectorized", action="store_true", help="use the vectorized engine (numpy) for testing and running")
+    parser.add_argument("--cache", action="store_true", help="cache the predicted structures while running, so sequences predicted before with the same weights are not predicted again")
+    parser.add_argument("--cache-size", type=int, default=10000, help="number of predicted structures held in memory by the cache")
+    parser.add_argument("--cache-file", metavar="FILENAME", help="also save the cached structures to the given database file, so they can be used again in later runs")
+    parser.add_argument("--compact", action="store_true", help="write each predicted sequence as a single tab separated line of its name, amino acids and structures")
+    parser.add_argument("--run-workers", type=int, default=1, help="number of worker processes predicting structures while running, or 0 for the number of CPUs")
+    parser.add_argument("--checkpoint", metavar="FILENAME", help="save the state of the optimization to the given file while optimizing")
+    parser.add_argument("--checkpoint-interval", type=float, default=60, help="seconds between saving checkpoints")
+    parser.add_argument("--resume", action="store_true", help="continue the optimization from the checkpoint file, if it exists")
+    parser.add_argument("--max-seconds", type=float, help="stop the optimization after this many seconds, saving the best weights so far")
+    parser.add_argument("--max-trials", type=int, help="stop the optimization after this many trials, saving the best weights so far")
+    parser.add_argument("--stochastic", action="store_true", help="optimize against random batches of sequences read from a binary corpus of the training file")
+    parser.add_argument("--batch-size", type=int, default=32, help="number of sequences in each batch for the largest step, growing four times for each smaller step")
+    parser.add_argument("--holdout-size", type=int, help="number of sequences held out to confirm new weights on, instead of all of them, which takes time in proportion to the size of the training file")
+    parser.add_argument("--seed", type=int, default=0, help="seed for drawing the batches and held out sequences")
+    args = parser.parse_args()
+    if args.tracemalloc and not args.profile:
+        parser.error("--tracemalloc is only used together with --profile")
+
+    opt_options = {"enable_incremental" : args.incremental, "arg_workers" : args.workers or None, "enable_binary_corpus" : args.binary_corpus, "enable_line_search" : args.line_search,
+                   "arg_checkpoint_filename" : args.checkpoint, "arg_checkpoint_interval" : args.checkpoint_interval, "enable_resume" : args.resume, "arg_max_seconds" : args.max_seconds, "arg_max_trials" : args.max_trials,
+                   "enable_stochastic" : args.stochastic, "arg_batch_size" : args.batch_size, "arg_holdout_size" : args.holdout_size, "arg_seed" : args.seed}
+
+    # combinations of options that would be ignored while optimizing are rejected before the program starts
+    try:
+        check_opt_options(args.incremental, opt_options["arg_workers"], args.line_search, args.checkpoint, args.resume, args.stochastic, args.holdout_size)
+    except ValueError as error:
+        parser.error(str(error))
+
+    test_options = {"enable_vectorized" : args.vectorized, "enable_binary_corpus" : args.binary_corpus}
+    run_options = {"enable_vectorized" : args.vectorized, "arg_workers" : args.run_workers or None,
+                   "enable_cache" : args.cache or args.cache_file is not None, "arg_cache_size" : args.cache_size, "arg_cache_filename" : args.cache_file,
+                   "enable_compact_output" : args.compact}
+    main(args.instrument, args.profile, args.tracemalloc, opt_options, test_options, run_options)
 
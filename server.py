@@ -0,0 +1,298 @@
+# preamble
+# region
+
+# a local prediction server for the structure prediction algorithm in main.py
+# the weights are loaded once, and predictions are answered over HTTP on localhost as JSON
+# requests arriving close together are gathered into batches, which are predicted by a pool of worker processes
+# more info can be found in the code's attached README file (README.md)
+
+# endregion
+
+
+# imports
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from os import cpu_count
+import argparse
+import asyncio
+import json
+import time
+
+import main
+
+
+# the number of latencies and batch sizes kept for the statistics
+stats_history = 10000
+
+
+# answers prediction requests, gathering requests that arrive close together into batches
+class PredictionServer:
+
+    def __init__(self, arg_weights_filename="weights.txt", arg_workers=None, arg_max_latency=0.005, arg_max_batch_size=256, enable_vectorized=True):
+
+        self.weights_filename = arg_weights_filename
+        self.workers = arg_workers or cpu_count() or 1
+        self.max_latency = arg_max_latency
+        self.max_batch_size = arg_max_batch_size
+        self.enable_vectorized = enable_vectorized
+
+        self.queue = None
+        self.pool = None
+        self.batcher = None
+        self.running_batches = set()
+        self.queued_sequences = 0
+        self.batch_sizes = deque(maxlen=stats_history)
+        self.latencies = deque(maxlen=stats_history)
+        self.requests = 0
+        self.sequences = 0
+        self.errors = 0
+        self.start_time = time.time()
+
+    # starts the worker processes and the batching, and starts listening for requests
+    # returns the asyncio server
+    async def start(self, arg_host="127.0.0.1", arg_port=8765):
+
+        # the workers load the weights file once, the same way as main_run does
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=main.init_prediction_worker, initargs=(self.weights_filename, self.enable_vectorized))
+        self.queue = asyncio.Queue()
+        self.batcher = asyncio.ensure_future(self.run_batcher())
+
+        return await asyncio.start_server(self.handle_connection, arg_host, arg_port)
+
+    # stops the batching and the worker processes
+    def close(self):
+
+        self.batcher.cancel()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    # predicts the structures of a list of sequences, waiting for them to be predicted as part of a batch
+    # returns the predicted structures
+    async def predict(self, arg_sequences):
+
+        future = asyncio.get_running_loop().create_future()
+        self.queued_sequences += len(arg_sequences)
+        await self.queue.put((arg_sequences, future))
+        return await future
+
+    # gathers queued requests into batches, until a batch holds enough sequences or the first request in it has waited long enough
+    async def run_batcher(self):
+
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self.queue.get()]
+            batch_size = len(batch[0][0])
+            deadline = loop.time() + self.max_latency
+
+            while batch_size < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(request)
+                batch_size += len(request[0])
+
+            # the batch is predicted in the background, so the next batch can be gathered in the meantime
+            task = asyncio.ensure_future(self.run_batch(batch, batch_size))
+            self.running_batches.add(task)
+            task.add_done_callback(self.running_batches.discard)
+
+    # predicts a batch in a worker process, and gives each request its own predicted structures
+    async def run_batch(self, arg_batch, arg_batch_size):
+
+        self.queued_sequences -= arg_batch_size
+        self.batch_sizes.append(arg_batch_size)
+
+        amino_strings = []
+        for sequences, future in arg_batch:
+            for sequence in sequences:
+                amino_strings.append("Z"*6 + sequence + "Z"*6)
+
+        try:
+            structures = await asyncio.get_running_loop().run_in_executor(self.pool, main.predict_chunk, amino_strings)
+        except Exception as exception:
+            for sequences, future in arg_batch:
+                if not future.done():
+                    future.set_exception(exception)
+            return
+
+        k = 0
+        for sequences, future in arg_batch:
+            if not future.done():
+                future.set_result(structures[k:k+len(sequences)])
+            k += len(sequences)
+
+    # returns the statistics of the server
+    def stats(self):
+
+        latencies = sorted(self.latencies)
+        batch_sizes = list(self.batch_sizes)
+
+        return {
+            "uptime_seconds" : round(time.time() - self.start_time, 3),
+            "requests" : self.requests,
+            "sequences" : self.sequences,
+            "errors" : self.errors,
+            "queue_depth" : self.queued_sequences,
+            "batches_running" : len(self.running_batches),
+            "batches" : len(batch_sizes),
+            "batch_size_mean" : round(sum(batch_sizes) / len(batch_sizes), 3) if batch_sizes else 0,
+            "batch_size_max" : max(batch_sizes) if batch_sizes else 0,
+            "latency_ms_p50" : round(percentile(latencies, 50)*1000, 3),
+            "latency_ms_p99" : round(percentile(latencies, 99)*1000, 3),
+        }
+
+    # answers a single HTTP request on a connection
+    async def handle_connection(self, arg_reader, arg_writer):
+
+        start = time.perf_counter()
+        status = 200
+
+        try:
+            method, target, body = await read_request(arg_reader)
+
+            if method == "GET" and target == "/stats":
+                response = self.stats()
+            elif method == "GET" and target == "/health":
+                response = {"status" : "ok"}
+            elif method == "POST" and target == "/predict":
+                sequences = parse_sequences(body)
+                structures = await self.predict(sequences)
+                response = {"structures" : structures}
+                self.requests += 1
+                self.sequences += len(sequences)
+                self.latencies.append(time.perf_counter() - start)
+            else:
+                status = 404
+                response = {"error" : "Unknown endpoint: " + method + " " + target}
+
+        except ValueError as exception:
+            status = 400
+            response = {"error" : str(exception)}
+        except Exception as exception:
+            status = 500
+            response = {"error" : str(exception)}
+
+        if status != 200:
+            self.errors += 1
+
+        try:
+            await write_response(arg_writer, status, response)
+        except ConnectionError:
+            pass
+        finally:
+            arg_writer.close()
+
+
+# returns the value at the given percentile of a sorted list, or 0 if the list is empty
+def percentile(arg_sorted_values, arg_percentile):
+
+    if not arg_sorted_values:
+        return 0.0
+    index = min(len(arg_sorted_values) - 1, int(len(arg_sorted_values) * arg_percentile / 100))
+    return arg_sorted_values[index]
+
+
+# reads a single HTTP request
+# returns the method, the target and the body
+async def read_request(arg_reader):
+
+    request_line = (await arg_reader.readline()).decode("latin-1").split()
+    if len(request_line) < 2:
+        raise ValueError("Invalid request")
+    method, target = request_line[0].upper(), request_line[1]
+
+    content_length = 0
+    while True:
+        line = (await arg_reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        name, separator, value = line.partition(":")
+        if name.strip().lower() == "content-length":
+            content_length = int(value.strip())
+
+    body = b""
+    if content_length > 0:
+        body = await arg_reader.readexactly(content_length)
+
+    return method, target, body
+
+
+# returns the list of sequences in the JSON body of a prediction request
+# the body holds either a single sequence as {"sequence": "..."}, or several as {"sequences": ["...", ...]}
+# the amino acids can be given in upper or lower case, the same as in a FASTA file
+def parse_sequences(arg_body):
+
+    try:
+        request = json.loads(arg_body or b"{}")
+    except json.JSONDecodeError:
+        raise ValueError("The request body must be JSON")
+
+    if not isinstance(request, dict):
+        raise ValueError("The request body must be a JSON object")
+    if "sequence" in request:
+        sequences = [request["sequence"]]
+    elif "sequences" in request:
+        sequences = request["sequences"]
+    else:
+        raise ValueError("The request must hold \"sequence\" or \"sequences\"")
+
+    if not isinstance(sequences, list) or not all(isinstance(sequence, str) for sequence in sequences):
+        raise ValueError("The sequences must be strings")
+
+    return [sequence.strip().upper() for sequence in sequences]
+
+
+# writes a JSON response
+async def write_response(arg_writer, arg_status, arg_response):
+
+    reasons = {200 : "OK", 400 : "Bad Request", 404 : "Not Found", 500 : "Internal Server Error"}
+    body = json.dumps(arg_response).encode("utf-8")
+    header = "HTTP/1.1 " + str(arg_status) + " " + reasons[arg_status] + "\r\nContent-Type: application/json\r\nContent-Length: " + str(len(body)) + "\r\nConnection: close\r\n\r\n"
+
+    arg_writer.write(header.encode("latin-1") + body)
+    await arg_writer.drain()
+
+
+# runs the server until it is stopped
+async def serve(arg_args):
+
+    server = PredictionServer(arg_args.weights, arg_args.workers, arg_args.max_latency_ms / 1000, arg_args.max_batch_size, not arg_args.no_vectorized)
+    listener = await server.start(arg_args.host, arg_args.port)
+
+    print("Serving predictions on http://" + arg_args.host + ":" + str(arg_args.port) + " (POST /predict, GET /stats)")
+
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+# main program
+def main_server(arg_argv=None):
+
+    parser = argparse.ArgumentParser(description="Serves structure predictions over HTTP on localhost.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on")
+    parser.add_argument("--weights", default="weights.txt", help="file holding the weights")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes, the number of CPUs by default")
+    parser.add_argument("--max-latency-ms", type=float, default=5.0, help="longest time a request waits for a batch to fill up, in milliseconds")
+    parser.add_argument("--max-batch-size", type=int, default=256, help="largest number of sequences in a batch")
+    parser.add_argument("--no-vectorized", action="store_true", help="use the regular engine instead of the vectorized one")
+    args = parser.parse_args(arg_argv)
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        print()
+        print("Stopping server.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    main_server()
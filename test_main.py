@@ -0,0 +1,557 @@
+# preamble
+# region
+
+# tests for the structure prediction algorithm in main.py
+# every engine is checked against run_sequence and run_full_test, which are kept as the reference implementation
+# the sequences and weights are random, drawn from a seed, and include amino acids outside the dictionaries (X, B and the "Z" padding)
+# run with: py -3 -m pytest test_main.py
+
+# endregion
+
+
+# imports
+from collections import deque
+import os
+import random
+
+import pytest
+
+import main
+
+
+# the amino acids the random sequences are drawn from, including ones that belong to none of the dictionaries
+test_aminos = "ACDEFGHIKLMNPQRSTVWYXBZ"
+structure_symbols = "he_"
+
+# the names of the dictionaries held by main, which the tests change and put back afterwards
+dict_names = ("helix_formers", "helix_high_indiff", "helix_breakers", "helix_indiff", "sheet_formers", "sheet_breakers", "sheet_indiff")
+
+
+# puts back the dictionaries held by main after each test
+@pytest.fixture(autouse=True)
+def restore_dicts():
+
+    saved = [getattr(main, name) for name in dict_names]
+    yield
+    for name, value in zip(dict_names, saved):
+        setattr(main, name, value)
+
+
+# sets the dictionaries held by main to the given weights
+def set_weights(arg_weight_list):
+
+    for name, value in zip(dict_names, main.create_dicts(arg_weight_list)):
+        setattr(main, name, value)
+
+
+# returns a list of random weights
+# the weights are rounded to one decimal, so that window sums often land exactly on their thresholds
+def random_weights(arg_rng):
+
+    return [round(arg_rng.uniform(0.5, 2.5), 1) for i in range (len(main.weight_targets))]
+
+
+# returns random amino strings and structure strings, padded the same way as read_file
+def random_sequences(arg_rng, arg_count=20, arg_max_length=120):
+
+    amino_strings = []
+    structure_strings = []
+    for i in range (arg_count):
+        length = arg_rng.randint(0, arg_max_length)
+        amino_strings.append("Z"*6 + "".join(arg_rng.choice(test_aminos) for j in range (length)) + "Z"*6)
+        structure_strings.append("z"*6 + "".join(arg_rng.choice(structure_symbols) for j in range (length)) + "z"*6)
+    return amino_strings, structure_strings
+
+
+# scores sequences with run_sequence and compare_structures, the reference implementation
+def reference_full_test(arg_amino_strings, arg_structure_strings):
+
+    total_score = 0
+    total_tries = 0
+    for i in range (len(arg_amino_strings)):
+        predicted_structure = main.run_sequence(arg_amino_strings[i])
+        total_score += main.compare_structures(predicted_structure, arg_structure_strings[i])
+        total_tries += len(predicted_structure)
+    return total_score, total_tries
+
+
+# breaker and indifferent sets to check the context table for, besides the default ones
+# the sets include amino acids outside the standard alphabet, the "Z" padding, and amino acids in several sets at once
+context_sets = [
+    ({"N" : 1.0, "X" : 1.0}, ["B", "Z", "P"], {"E" : 2.0, "U" : 1.0}, ["X"]),
+    ({}, [], {}, []),
+    ({"P" : 1.0, "E" : 1.0, "B" : 0.5}, ["P", "E"], {"P" : 1.0, "E" : 1.0, "Z" : 1.0}, ["B", "O", "C"]),
+]
+
+
+def test_verify_context_table_default():
+
+    assert main.verify_context_table()
+
+
+@pytest.mark.parametrize("sets", context_sets)
+def test_verify_context_table(sets):
+
+    main.helix_breakers, main.helix_indiff, main.sheet_breakers, main.sheet_indiff = sets
+    assert main.verify_context_table()
+
+
+@pytest.mark.parametrize("sets", context_sets)
+def test_context_table_matches_run_sequence(sets):
+
+    main.helix_breakers, main.helix_indiff, main.sheet_breakers, main.sheet_indiff = sets
+    amino_strings, structure_strings = random_sequences(random.Random(0))
+    for amino_string in amino_strings:
+        assert main.run_sequence_encoded(amino_string) == main.run_sequence(amino_string)
+
+
+@pytest.mark.parametrize("seed", range (5))
+def test_sequence_engines_match_run_sequence(seed):
+
+    rng = random.Random(seed)
+    set_weights(random_weights(rng))
+    amino_strings, structure_strings = random_sequences(rng)
+
+    for amino_string in amino_strings:
+        expected = main.run_sequence(amino_string)
+        assert main.run_sequence_encoded(amino_string) == expected
+        assert main.run_sequence_vectorized(amino_string) == expected
+
+    expected = [main.run_sequence(amino_string) for amino_string in amino_strings]
+    assert main.run_prediction(amino_strings) == expected
+    assert main.run_prediction(amino_strings, True) == expected
+    assert [structure for amino, structure in main.predict_records(zip(amino_strings, structure_strings))] == expected
+
+
+@pytest.mark.parametrize("seed", range (5))
+def test_full_test_engines_match_run_full_test(seed):
+
+    rng = random.Random(seed)
+    weight_list = random_weights(rng)
+    set_weights(weight_list)
+    amino_strings, structure_strings = random_sequences(rng)
+    amino_codes, structure_codes = main.encode_sequences(amino_strings, structure_strings)
+
+    expected = reference_full_test(amino_strings, structure_strings)
+    assert main.run_full_test(amino_strings, structure_strings) == expected
+    assert main.run_full_test(amino_strings, structure_strings, True) == expected
+    assert main.run_full_test_encoded(amino_codes, structure_codes, main.create_tables(weight_list)) == expected
+    assert main.run_full_test_encoded(amino_codes, structure_codes, main.create_tables(weight_list), True) == expected
+
+
+# without numpy, the evaluator recomputes the changed windows one at a time instead
+@pytest.mark.parametrize("seed", range (3))
+@pytest.mark.parametrize("enable_numpy", (True, False))
+def test_incremental_evaluator_matches_run_full_test(seed, enable_numpy, monkeypatch):
+
+    if not enable_numpy:
+        monkeypatch.setattr(main, "np", None)
+
+    rng = random.Random(seed)
+    weight_list = random_weights(rng)
+    amino_strings, structure_strings = random_sequences(rng)
+    amino_codes, structure_codes = main.encode_sequences(amino_strings, structure_strings)
+
+    set_weights(weight_list)
+    evaluator = main.IncrementalEvaluator(amino_codes, structure_codes, weight_list)
+    assert evaluator.score() == reference_full_test(amino_strings, structure_strings)
+
+    for trial in range (40):
+        j = rng.randrange(len(weight_list))
+        weight_list[j] = round(weight_list[j] + rng.choice((-0.1, 0.1, -0.5, 0.5)), 1)
+        set_weights(weight_list)
+        assert evaluator.set_weight(j, weight_list[j]) == reference_full_test(amino_strings, structure_strings)
+
+
+# every interval the line search sweeps through is scored the same as setting the weight inside it and running the reference implementation
+@pytest.mark.parametrize("seed", range (3))
+def test_sweep_line_matches_run_sequence(seed, monkeypatch):
+
+    rng = random.Random(seed)
+    weight_list = random_weights(rng)
+    amino_strings, structure_strings = random_sequences(rng)
+    amino_codes, structure_codes = main.encode_sequences(amino_strings, structure_strings)
+    evaluator = main.IncrementalEvaluator(amino_codes, structure_codes, weight_list)
+
+    sweeps = []
+    sweep_line = evaluator.sweep_line
+    def record_sweep(*args):
+        results = sweep_line(*args)
+        sweeps.extend(results)
+        return results
+    monkeypatch.setattr(evaluator, "sweep_line", record_sweep)
+
+    for j in rng.sample(range (len(weight_list)), 8):
+        del sweeps[:]
+        evaluator.line_search(j, weight_list[j] - 1, weight_list[j] + 1)
+
+        for representative, score in rng.sample(sweeps, min(len(sweeps), 5)):
+            set_weights(weight_list[:j] + [representative] + weight_list[j+1:])
+            assert score == reference_full_test(amino_strings, structure_strings)[0]
+
+
+@pytest.mark.parametrize("seed", range (3))
+def test_population_evaluator_matches_run_full_test(seed):
+
+    rng = random.Random(seed)
+    amino_strings, structure_strings = random_sequences(rng)
+    amino_codes, structure_codes = main.encode_sequences(amino_strings, structure_strings)
+    weight_lists = [random_weights(rng) for i in range (8)]
+
+    expected = []
+    for weight_list in weight_lists:
+        set_weights(weight_list)
+        expected.append(reference_full_test(amino_strings, structure_strings))
+
+    # a small chunk size puts the sequences into several chunks
+    assert main.PopulationEvaluator(amino_codes, structure_codes, 300).score(weight_lists) == expected
+
+
+@pytest.mark.parametrize("seed", range (3))
+def test_scan_mutations_matches_run_sequence(seed):
+
+    rng = random.Random(seed)
+    set_weights(random_weights(rng))
+    sequence = "".join(rng.choice(test_aminos) for j in range (40))
+    wild_type = main.run_sequence("Z"*6 + sequence + "Z"*6)
+
+    # every position is mutated to every residue except its own
+    residues = main.mutation_residues + "XB"
+    records = list(main.scan_mutations(sequence, main.get_tables(), residues))
+    assert len(records) == sum(len(residues) - residues.count(amino) for amino in sequence)
+
+    for position, wild_type_amino, mutant, changed, helix_fraction, sheet_fraction in records:
+        assert wild_type_amino == sequence[position - 1]
+        assert mutant != wild_type_amino
+        mutated = main.run_sequence("Z"*6 + sequence[:position - 1] + mutant + sequence[position:] + "Z"*6)
+        assert changed == sum(mutated[i] != wild_type[i] for i in range (len(sequence)))
+        assert helix_fraction == mutated.count("h") / len(sequence)
+        assert sheet_fraction == mutated.count("e") / len(sequence)
+
+
+def test_write_mutation_scan_writes_one_row_per_position(tmp_path):
+
+    rng = random.Random(0)
+    set_weights(random_weights(rng))
+    amino_strings, structure_strings = random_sequences(rng, 3, 30)
+    filename = str(tmp_path / "mutation_scan.txt")
+    main.write_mutation_scan(filename, zip(amino_strings, structure_strings), main.get_tables(), enable_console=False)
+
+    with open(filename) as f:
+        header = f.readline().rstrip("\n").split("\t")
+        rows = [line.rstrip("\n").split("\t") for line in f]
+    assert len(header) == 3 + 3*len(main.mutation_residues)
+    assert len(rows) == sum(len(amino) - 12 for amino in amino_strings)
+
+    number = 1
+    rows_left = rows
+    for amino in amino_strings:
+        sequence = amino[6:-6]
+        sequence_rows, rows_left = rows_left[:len(sequence)], rows_left[len(sequence):]
+        for position, wild_type, mutant, changed, helix_fraction, sheet_fraction in main.scan_mutations(sequence, main.get_tables()):
+            row = sequence_rows[position - 1]
+            assert row[:3] == [str(number), str(position), wild_type]
+            assert row[header.index(mutant)] == str(changed)
+            assert row[header.index("helix_" + mutant)] == str(round(helix_fraction, 4))
+        for row in sequence_rows:
+            if row[2] in main.mutation_residues:
+                assert row[header.index(row[2])] == "-"
+        number += 1
+
+
+# the rows of each sequence of a FASTA file are named by its header, as the names are read along with the sequences
+def test_write_mutation_scan_names_fasta_sequences(tmp_path):
+
+    input_filename = str(tmp_path / "sequences.fasta")
+    with open(input_filename, "w") as f:
+        f.write(">first protein\nMKTAYIAK\n>second\nGSHMLE\n")
+
+    names = deque()
+    filename = str(tmp_path / "mutation_scan.txt")
+    main.write_mutation_scan(filename, main.read_input_records(input_filename, names), main.get_tables(), names, False)
+
+    with open(filename) as f:
+        f.readline()
+        rows = [line.split("\t")[:3] for line in f]
+    assert rows == [["first protein", str(r + 1), amino] for r, amino in enumerate("MKTAYIAK")] + [["second", str(r + 1), amino] for r, amino in enumerate("GSHMLE")]
+
+
+# FASTA records can span several lines, hold comments, end in "*", be empty or be in lower case, and each name belongs to the record after its header
+def test_read_fasta_records(tmp_path):
+
+    filename = str(tmp_path / "sequences.fasta")
+    with open(filename, "w") as f:
+        f.write(">first protein\nMKT\nayi ak*\n; a comment\n>empty\n>third\nGS*\n")
+
+    names = deque()
+    records = []
+    for record in main.read_fasta_records(filename, names):
+        records.append((names[-1], record))
+    assert records == [("first protein", ("Z"*6 + "MKTAYIAK" + "Z"*6, "z"*12)), ("empty", ("Z"*12, "z"*12)), ("third", ("Z"*6 + "GS" + "Z"*6, "z"*12))]
+
+
+# the names given to the compact writer can be a list as well as a deque filled while reading
+@pytest.mark.parametrize("enable_list", (True, False))
+def test_write_structures_compact_names(tmp_path, enable_list):
+
+    input_filename = str(tmp_path / "sequences.fasta")
+    with open(input_filename, "w") as f:
+        f.write(">first\nMKTAYIAK\n>second\nGSHMLE\n")
+
+    names = deque()
+    records = main.predict_records(main.read_input_records(input_filename, names))
+    if enable_list:
+        records = list(records)
+        names = list(names)
+    filename = str(tmp_path / "predicted_structures.tsv")
+    main.write_structures_compact(filename, records, names, False)
+
+    with open(filename) as f:
+        rows = [line.split("\t")[:2] for line in f]
+    assert rows == [["first", "MKTAYIAK"], ["second", "GSHMLE"]]
+
+
+# compressed files are written and read again through open_text, and sequences are read from them the same as from plain files
+@pytest.mark.parametrize("extension", (".gz", ".bz2", ".xz"))
+def test_open_text_round_trip(tmp_path, extension):
+
+    text = ">first\nMKTAYIAK\n>second\nGSHMLE\n"
+    plain_filename = str(tmp_path / "sequences.fasta")
+    filename = plain_filename + extension
+    with open(plain_filename, "w") as f:
+        f.write(text)
+    with main.open_text(filename, "w") as f:
+        f.write(text)
+
+    with open(filename, "rb") as f:
+        assert f.read() != text.encode()
+    with main.open_text(filename) as f:
+        assert f.read() == text
+    assert main.is_fasta_file(filename)
+    assert list(main.read_input_records(filename)) == list(main.read_input_records(plain_filename))
+
+
+@pytest.mark.parametrize("seed", range (3))
+def test_predictor_matches_run_full_test(seed):
+
+    rng = random.Random(seed)
+    weight_list = random_weights(rng)
+    amino_strings, structure_strings = random_sequences(rng)
+    predictor = main.Predictor(weight_list)
+
+    set_weights(weight_list)
+    for amino_string in amino_strings:
+        assert predictor.predict(amino_string[6:-6]) == main.run_sequence(amino_string)
+    assert predictor.score([amino[6:-6] for amino in amino_strings], [structure[6:-6] for structure in structure_strings]) == reference_full_test(amino_strings, structure_strings)
+
+
+def test_predictor_ignores_case():
+
+    rng = random.Random(0)
+    predictor = main.Predictor(random_weights(rng))
+    sequence = "".join(rng.choice(test_aminos) for j in range (60))
+    assert predictor.predict(sequence.lower()) == predictor.predict(sequence)
+    assert list(predictor.scan_mutations(sequence.lower())) == list(predictor.scan_mutations(sequence))
+
+
+# writes random sequences to a file, in the same format as the training and testing files
+def write_sequences(arg_filename, arg_amino_strings, arg_structure_strings):
+
+    with open(arg_filename, "w") as f:
+        for k in range (len(arg_amino_strings)):
+            f.write("<>\n")
+            for j in range (6, len(arg_amino_strings[k]) - 6):
+                f.write(arg_amino_strings[k][j] + " " + arg_structure_strings[k][j] + "\n")
+            f.write("<end>\n")
+
+
+def test_corpus_matches_encode_sequences(tmp_path):
+
+    filename = str(tmp_path / "sequences.txt")
+    write_sequences(filename, *random_sequences(random.Random(0)))
+    expected = main.encode_sequences(*main.read_file(filename, "", False))
+
+    with main.open_corpus(filename) as corpus:
+        amino_codes, structure_codes = corpus.sequences()
+        assert [bytes(codes) for codes in amino_codes] == expected[0]
+        assert [bytes(codes) for codes in structure_codes] == expected[1]
+
+
+# a corpus file that is cut short is converted again, instead of being used or raising an error
+def test_truncated_corpus_is_rebuilt(tmp_path):
+
+    filename = str(tmp_path / "sequences.txt")
+    write_sequences(filename, *random_sequences(random.Random(0)))
+    main.open_corpus(filename).close()
+
+    with open(filename + ".corpus", "r+b") as f:
+        f.truncate(os.path.getsize(filename + ".corpus") - 5)
+    with pytest.raises(ValueError):
+        main.Corpus(filename + ".corpus")
+
+    with main.open_corpus(filename) as corpus:
+        amino_codes, structure_codes = corpus.sequences()
+        assert [bytes(codes) for codes in amino_codes] == main.encode_sequences(*main.read_file(filename, "", False))[0]
+
+
+# resuming from the checkpoint of a finished optimization gives the same result without optimizing any further
+def test_resume_finished_optimization(tmp_path):
+
+    filename = str(tmp_path / "sequences.txt")
+    checkpoint_filename = str(tmp_path / "checkpoint.json")
+    write_sequences(filename, *random_sequences(random.Random(0)))
+
+    result = main.run_optimization(filename, False, True, arg_checkpoint_filename=checkpoint_filename, enable_resume=True)
+    assert main.read_checkpoint(checkpoint_filename)["step_level"] == 4
+    assert main.run_optimization(filename, False, True, arg_checkpoint_filename=checkpoint_filename, enable_resume=True) == result
+
+
+# the line search ends with a score at least as good as the fixed step search on the same data
+@pytest.mark.parametrize("seed", range (3))
+def test_line_search_scores_at_least_fixed_steps(tmp_path, seed):
+
+    filename = str(tmp_path / "sequences.txt")
+    write_sequences(filename, *random_sequences(random.Random(seed)))
+
+    fixed_score = main.run_optimization(filename, False, True)[0]
+    line_search_score = main.run_optimization(filename, False, enable_line_search=True)[0]
+    assert line_search_score >= fixed_score
+
+
+# the parallel optimization stops once its budget runs out, after the block of candidates that used it up
+def test_parallel_optimization_stops_when_budget_runs_out(tmp_path):
+
+    filename = str(tmp_path / "sequences.txt")
+    write_sequences(filename, *random_sequences(random.Random(0)))
+
+    # with two workers, each block holds both directions of a single coordinate
+    budget = main.OptimizationBudget(None, 3)
+    best_score, tries, weight_list = main.run_optimization_parallel(filename, False, 2, 0, False, budget)
+    assert budget.trials == 4
+    set_weights(weight_list)
+    assert (best_score, tries) == reference_full_test(*main.read_file(filename, "", False))
+
+
+# options that the chosen optimization algorithm would ignore are rejected
+@pytest.mark.parametrize("options", (
+    {"arg_workers" : 2, "enable_incremental" : True},
+    {"arg_workers" : None, "arg_checkpoint_filename" : "checkpoint.json"},
+    {"enable_line_search" : True, "enable_resume" : True},
+    {"enable_stochastic" : True, "arg_checkpoint_filename" : "checkpoint.json"},
+    {"enable_stochastic" : True, "arg_workers" : 2},
+    {"arg_holdout_size" : 5}))
+def test_check_opt_options_rejects_ignored_options(options):
+
+    with pytest.raises(ValueError):
+        main.check_opt_options(**options)
+    with pytest.raises(ValueError):
+        main.main_opt("train.txt", False, **options)
+
+
+def test_check_opt_options_accepts_used_options():
+
+    main.check_opt_options(enable_incremental=True, arg_checkpoint_filename="checkpoint.json", enable_resume=True)
+    main.check_opt_options(enable_incremental=True, enable_line_search=True)
+    main.check_opt_options(arg_workers=4)
+    main.check_opt_options(enable_stochastic=True, arg_holdout_size=5)
+
+
+# training data too small to confirm new weights on is rejected up front, instead of failing while writing the progress
+@pytest.mark.parametrize("count, max_length, holdout_size", ((0, 50, None), (1, 50, 5), (3, 0, None), (3, 0, 1)))
+def test_stochastic_optimization_rejects_too_little_data(tmp_path, count, max_length, holdout_size):
+
+    filename = str(tmp_path / "sequences.txt")
+    write_sequences(filename, *random_sequences(random.Random(0), count, max_length))
+
+    with pytest.raises(ValueError):
+        main.run_optimization_stochastic(filename, 4, holdout_size, 0, None, True)
+
+
+def test_stochastic_optimization_single_sequence(tmp_path):
+
+    filename = str(tmp_path / "sequences.txt")
+    amino_strings, structure_strings = ["Z"*6 + "MKTAYIAKQRQISFVKSHFSRQ" + "Z"*6], ["z"*6 + "cchhhhhhhhhhcceeeecccc" + "z"*6]
+    write_sequences(filename, amino_strings, structure_strings)
+
+    best_score, tries, weight_list = main.run_optimization_stochastic(filename, 4, None, 0, main.OptimizationBudget(None, 20), True)
+    set_weights(weight_list)
+    assert (best_score, tries) == reference_full_test(amino_strings, structure_strings)
+
+
+# runs main_run in the given directory, without asking for any input, and returns the contents of the file it writes
+def run_main_run(arg_directory, arg_filename, arg_output_filename="predicted_structures.txt", **kwargs):
+
+    main.main_run(arg_filename, False, **kwargs)
+    with open(os.path.join(arg_directory, arg_output_filename), "rb") as f:
+        return f.read()
+
+
+# running in a pool of worker processes, with or without the prediction cache, writes exactly the same file as running in a single process
+def test_main_run_parallel_matches_serial(tmp_path, monkeypatch):
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("builtins.input", lambda arg_prompt="": "")
+    monkeypatch.setattr(main, "prediction_cache", None)
+
+    rng = random.Random(0)
+    main.write_weights("weights.txt", random_weights(rng), False)
+    write_sequences("data.txt", *random_sequences(rng, 200, 300))
+
+    expected = run_main_run(tmp_path, "data.txt")
+    assert run_main_run(tmp_path, "data.txt", arg_workers=2) == expected
+    assert run_main_run(tmp_path, "data.txt", arg_workers=2, enable_cache=True) == expected
+    assert run_main_run(tmp_path, "data.txt", arg_workers=2, enable_cache=True) == expected
+    assert run_main_run(tmp_path, "data.txt", arg_workers=1, enable_cache=True) == expected
+    assert run_main_run(tmp_path, "data.txt", arg_workers=2, enable_vectorized=True) == expected
+
+
+# a change of weights changes the fingerprint, so structures predicted with the earlier weights are not used
+def test_prediction_cache_misses_after_weight_change():
+
+    rng = random.Random(0)
+    amino_strings, structure_strings = random_sequences(rng)
+    cache = main.PredictionCache()
+
+    set_weights(random_weights(rng))
+    first = [structure for amino, structure in main.predict_records(zip(amino_strings, structure_strings), False, cache)]
+    assert (cache.hits, cache.misses) == (0, len(amino_strings))
+    cache.reset_counts()
+    assert [structure for amino, structure in main.predict_records(zip(amino_strings, structure_strings), False, cache)] == first
+    assert (cache.hits, cache.misses) == (len(amino_strings), 0)
+
+    set_weights(random_weights(rng))
+    cache.reset_counts()
+    second = [structure for amino, structure in main.predict_records(zip(amino_strings, structure_strings), False, cache)]
+    assert (cache.hits, cache.misses) == (0, len(amino_strings))
+    assert second == [main.run_sequence(amino_string) for amino_string in amino_strings]
+
+
+# the cache holds at most its maximum size, dropping the least recently used structures first
+def test_prediction_cache_drops_least_recently_used():
+
+    cache = main.PredictionCache(2)
+    cache.put("A", "w", "_")
+    cache.put("C", "w", "h")
+    assert cache.get("A", "w") == "_"
+    cache.put("D", "w", "e")
+
+    assert len(cache.entries) == 2
+    assert cache.get("C", "w") is None
+    assert cache.get("A", "w") == "_"
+    assert cache.get("D", "w") == "e"
+
+
+# structures saved to a database file are found by a new cache using the same file, as disk hits
+def test_prediction_cache_file_survives_between_caches(tmp_path):
+
+    filename = str(tmp_path / "cache.db")
+    cache = main.PredictionCache(10, filename)
+    cache.put("ACD", "w", "hh_")
+    cache.flush()
+    cache.connection.close()
+
+    cache = main.PredictionCache(10, filename)
+    assert cache.get("ACD", "w") == "hh_"
+    assert cache.get("ACD", "other weights") is None
+    assert (cache.hits, cache.disk_hits, cache.misses) == (1, 1, 1)
+    cache.connection.close()